@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CdsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cds'
+
+    def ready(self):
+        import apps.cds.signals
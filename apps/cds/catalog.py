@@ -0,0 +1,142 @@
+"""
+In-process snapshot of the CDS menu.
+
+The menu is small and rarely edited but read constantly, so get_cds_items
+filters, sorts and paginates against an immutable snapshot of CDS_Item rows
+instead of querying the table on every request. Every worker keeps its own
+snapshot and reloads it lazily once the shared CDSCatalogVersion counter
+(bumped from signals on every CDS_Item write) has moved on.
+"""
+import threading
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CDS_Item, CDSCatalogVersion
+
+CATALOG_VERSION_PK = 1
+
+_ROW_FIELDS = ('item_id', 'name', 'description', 'price', 'image', 'availability', 'category')
+
+
+class CatalogRow:
+    """Read-only copy of a single CDS_Item"""
+    __slots__ = _ROW_FIELDS
+
+    def __init__(self, item_id, name, description, price, image, availability, category):
+        self.item_id = item_id
+        self.name = name
+        self.description = description
+        self.price = price
+        self.image = image
+        self.availability = availability
+        self.category = category
+
+    def as_dict(self):
+        return {
+            'item_id': self.item_id,
+            'name': self.name,
+            'category': self.category,
+            'description': self.description,
+            'price': float(self.price),
+            'image': self.image,
+            'availability': self.availability,
+        }
+
+
+class CatalogSnapshot:
+    """Immutable view of the whole catalog with presorted orderings"""
+    __slots__ = ('version', 'by_id', 'by_price', 'rows_by_id')
+
+    def __init__(self, version, rows):
+        self.version = version
+        # Newest first, matching the default '-item_id' ordering of the listing
+        self.by_id = tuple(sorted(rows, key=lambda row: row.item_id, reverse=True))
+        # Stable sort, so equal prices keep the newest-first order
+        self.by_price = tuple(sorted(self.by_id, key=lambda row: row.price))
+        self.rows_by_id = {row.item_id: row for row in self.by_id}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def ordered(self, sort_by=None):
+        if sort_by == 'price_asc':
+            return self.by_price
+        if sort_by == 'price_desc':
+            return self.by_price[::-1]
+        return self.by_id
+
+    def filter(self, ids=None, category=None, min_price=None, max_price=None, availability=None, sort_by=None):
+        """
+        Return the matching rows as a list, in the requested order.
+        ids restricts the result to those items; without an explicit sort_by
+        the rows keep the order of ids (e.g. search relevance).
+        """
+        if ids is None:
+            candidates = self.ordered(sort_by)
+        elif sort_by in ('price_asc', 'price_desc'):
+            wanted = set(ids)
+            candidates = [row for row in self.ordered(sort_by) if row.item_id in wanted]
+        else:
+            candidates = [self.rows_by_id[item_id] for item_id in ids if item_id in self.rows_by_id]
+
+        matches = []
+        for row in candidates:
+            if min_price is not None and row.price < min_price:
+                continue
+            if max_price is not None and row.price > max_price:
+                continue
+            if category and row.category != category:
+                continue
+            if availability is not None and row.availability != availability:
+                continue
+            matches.append(row)
+        return matches
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog_version():
+    version = CDSCatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_catalog_version():
+    """Invalidate every worker's snapshot; call after any CDS_Item write"""
+    updated = CDSCatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+    if not updated:
+        CDSCatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_PK, defaults={'version': 1})
+
+
+def load_catalog_snapshot(version):
+    rows = [
+        CatalogRow(item_id, name, description, Decimal(price), image, availability, category)
+        for item_id, name, description, price, image, availability, category
+        in CDS_Item.objects.order_by().values_list(*_ROW_FIELDS)
+    ]
+    return CatalogSnapshot(version, rows)
+
+
+def get_catalog_snapshot():
+    """
+    Return the current snapshot, reloading it if the catalog version changed.
+    Costs one primary-key lookup per call while the snapshot is fresh.
+    """
+    global _snapshot
+    # Read the version before the rows: a write landing in between only
+    # makes the snapshot newer than its label, never older.
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = load_catalog_snapshot(version)
+        return _snapshot
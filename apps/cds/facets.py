@@ -0,0 +1,74 @@
+"""
+Incremental maintenance of the CDSCategory facet table.
+
+Counts are adjusted by deltas as CDS_Item rows are created, edited or deleted,
+so get_cds_categories reads a handful of category rows instead of scanning
+every item. Writes that skip the signals (raw SQL, queryset updates) can
+make the counts drift; rebuild_category_facets recomputes them.
+"""
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest, Trim
+
+from .models import CDSCategory, CDS_Item
+
+_COUNT_FIELDS = ('item_count', 'available_count')
+
+
+def normalize_category(category):
+    return (category or '').strip()
+
+
+def adjust_category_counts(category, items=0, available=0):
+    """Add the given deltas to a category's item and available-item counts"""
+    name = normalize_category(category)
+    if not name or (not items and not available):
+        return
+
+    # Clamped at zero so a count that has drifted low cannot fail the
+    # item write on the column's CHECK constraint
+    deltas = {
+        'item_count': Greatest(F('item_count') + items, 0),
+        'available_count': Greatest(F('available_count') + available, 0),
+    }
+    if not CDSCategory.objects.filter(name=name).update(**deltas):
+        CDSCategory.objects.get_or_create(name=name)
+        CDSCategory.objects.filter(name=name).update(**deltas)
+
+
+def move_item_between_categories(old_category, old_available, new_category, new_available):
+    """Apply the count changes for an item whose category or availability changed"""
+    if normalize_category(old_category) == normalize_category(new_category):
+        adjust_category_counts(new_category, available=int(new_available) - int(old_available))
+        return
+    adjust_category_counts(old_category, items=-1, available=-int(old_available))
+    adjust_category_counts(new_category, items=1, available=int(new_available))
+
+
+def rebuild_category_facets():
+    """Recompute every category's counts from the items; returns the number of categories"""
+    rows = (
+        CDS_Item.objects.order_by()
+        .annotate(category_name=Trim('category'))
+        .exclude(category_name__isnull=True).exclude(category_name='')
+        .values('category_name')
+        .annotate(
+            n_items=Count('pk'),
+            n_available=Count('pk', filter=Q(availability=True)),
+        )
+        .values_list('category_name', 'n_items', 'n_available')
+    )
+    categories = [
+        CDSCategory(name=name, item_count=n_items, available_count=n_available)
+        for name, n_items, n_available in rows
+    ]
+    CDSCategory.objects.bulk_create(
+        categories,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=list(_COUNT_FIELDS)
+    )
+    # Categories with no items left keep their row at zero
+    CDSCategory.objects.exclude(name__in=[category.name for category in categories]).update(
+        item_count=0, available_count=0
+    )
+    return len(categories)
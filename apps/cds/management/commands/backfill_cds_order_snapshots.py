@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from apps.cds.orders import backfill_order_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Copy product name and price onto CDS order lines that predate the snapshot columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Order-line ids covered by each UPDATE'
+        )
+
+    def handle(self, *args, **options):
+        updated = 0
+        for ids_below, updated in backfill_order_snapshots(options['batch_size']):
+            self.stdout.write(f'  ids < {ids_below}: {updated} lines filled')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled {updated} order lines')
+        )
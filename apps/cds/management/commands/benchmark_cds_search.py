@@ -0,0 +1,76 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from apps.cds.models import CDS_Item
+from apps.cds.search import ranked_item_ids, update_search_vectors
+from apps.common.benchmarking import ROLLBACK_NOTICE, analyze, measure, rolled_back, sample_name
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ranked CDS search against the legacy icontains scan at growing catalog sizes'
+
+    ADJECTIVES = ['Spicy', 'Crispy', 'Grilled', 'Fresh', 'Iced', 'Hot', 'Cheesy', 'Classic', 'Smoky', 'Sweet']
+    NOUNS = ['Chicken', 'Burger', 'Sandwich', 'Coffee', 'Noodles', 'Waffle', 'Samosa', 'Juice', 'Pasta', 'Roll']
+    CATEGORIES = ['Food', 'Drinks', 'Snacks', 'Desserts', 'Stationery']
+    MATCHING_ROWS = 200
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,10000,50000',
+            help='Comma-separated catalog sizes to benchmark'
+        )
+        parser.add_argument(
+            '--queries',
+            default='chicken,coffee,sandwch,waff',
+            help='Comma-separated search terms (include typos and prefixes)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per query'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        queries = [query.strip() for query in options['queries'].split(',') if query.strip()]
+        repeat = options['repeat']
+
+        self.stdout.write(ROLLBACK_NOTICE)
+        self.stdout.write(f"{'items':>8} {'ranked p50':>11} {'ranked p95':>11} {'icontains p50':>14} {'icontains p95':>14}")
+
+        for size in sizes:
+            with rolled_back():
+                self.seed(size)
+                ranked = measure(lambda query: ranked_item_ids(query), queries, repeat)
+                legacy = measure(
+                    lambda query: list(CDS_Item.objects.filter(
+                        Q(name__icontains=query) | Q(category__icontains=query)
+                    ).values_list('item_id', flat=True)),
+                    queries, repeat
+                )
+
+            self.stdout.write(
+                f'{size:>8} {ranked[0]:>9.2f}ms {ranked[1]:>9.2f}ms {legacy[0]:>12.2f}ms {legacy[1]:>12.2f}ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
+
+    def seed(self, size):
+        """Fill the table up to size rows"""
+        missing = max(size - CDS_Item.objects.count(), 0)
+        items = [
+            CDS_Item(
+                name=sample_name(index, self.MATCHING_ROWS, self.ADJECTIVES, self.NOUNS),
+                description='Benchmark item',
+                price=round(random.uniform(20, 500), 2),
+                availability=random.random() < 0.8,
+                category=random.choice(self.CATEGORIES),
+            )
+            for index in range(missing)
+        ]
+        CDS_Item.objects.bulk_create(items, batch_size=5000)
+        update_search_vectors(CDS_Item.objects.filter(search_vector__isnull=True))
+        analyze(CDS_Item)
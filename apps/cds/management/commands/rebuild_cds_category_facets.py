@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.cds.facets import rebuild_category_facets
+
+
+class Command(BaseCommand):
+    help = 'Recompute the item counts stored for every CDS category'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_category_facets()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt counts for {rebuilt} categories')
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+def populate_categories(apps, schema_editor):
+    CDS_Item = apps.get_model('cds', 'CDS_Item')
+    CDSCategory = apps.get_model('cds', 'CDSCategory')
+    counts = {}
+    for category, availability in CDS_Item.objects.values_list('category', 'availability'):
+        name = (category or '').strip()
+        if not name:
+            continue
+        items, available = counts.get(name, (0, 0))
+        counts[name] = (items + 1, available + int(availability))
+    CDSCategory.objects.bulk_create([
+        CDSCategory(name=name, item_count=items, available_count=available)
+        for name, (items, available) in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0002_cdscatalogversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CDSCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('available_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'CDS Category',
+                'verbose_name_plural': 'CDS Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(populate_categories, migrations.RunPython.noop),
+    ]
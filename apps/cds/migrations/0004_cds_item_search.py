@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    CDS_Item = apps.get_model('cds', 'CDS_Item')
+    CDS_Item.objects.update(
+        search_vector=SearchVector('name', weight='A') +
+                      SearchVector('category', weight='B') +
+                      SearchVector('description', weight='C')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0003_cdscategory'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='cds_item',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='cds_item',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='cds_cds_ite_search__5af0fc_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='cds_item',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='cds_item_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
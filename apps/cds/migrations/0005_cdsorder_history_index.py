@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0004_cds_item_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cdsorder',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='cds_cdsorde_user_id_619153_idx'),
+        ),
+    ]
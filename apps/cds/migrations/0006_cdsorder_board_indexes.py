@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0005_cdsorder_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cdsorder',
+            name='delivery_status',
+            field=models.CharField(choices=[('preparing', 'Preparing'), ('ready', 'Ready'), ('cancelled', 'Cancelled')], default='preparing', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='cdsorder',
+            index=models.Index(fields=['-created_at', '-id'], name='cds_cdsorde_created_823df3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cdsorder',
+            index=models.Index(fields=['delivery_status', '-created_at', '-id'], name='cds_cdsorde_deliver_4bea7c_idx'),
+        ),
+    ]
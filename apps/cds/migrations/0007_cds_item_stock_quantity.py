@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0006_cdsorder_board_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cds_item',
+            name='stock_quantity',
+            field=models.PositiveIntegerField(blank=True, help_text='Units left; leave empty to manage availability by hand', null=True),
+        ),
+    ]
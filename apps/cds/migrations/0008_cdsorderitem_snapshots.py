@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0007_cds_item_stock_quantity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cdsorderitem',
+            name='name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='cdsorderitem',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
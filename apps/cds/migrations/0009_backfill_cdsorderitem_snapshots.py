@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_snapshots(apps, schema_editor):
+    CDS_Item = apps.get_model('cds', 'CDS_Item')
+    CDSOrderItem = apps.get_model('cds', 'CDSOrderItem')
+    last_id = CDSOrderItem.objects.aggregate(last=Max('id'))['last'] or 0
+    product = CDS_Item.objects.filter(pk=OuterRef('product_id'))
+
+    # One set-based UPDATE per id range; already-filled lines are skipped
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        CDSOrderItem.objects.filter(
+            id__gte=start,
+            id__lt=start + BATCH_SIZE,
+            unit_price__isnull=True
+        ).update(
+            name=Subquery(product.values('name')[:1]),
+            unit_price=Subquery(product.values('price')[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cds', '0008_cdsorderitem_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
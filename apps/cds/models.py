@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.contrib.postgres.indexes import GinIndex
 
 from django.conf import settings
 
@@ -10,12 +12,44 @@ class CDS_Item(models.Model):
     image = models.URLField(max_length=500, blank=True, null=True, help_text="URL to item image")
     availability = models.BooleanField(default=True)
     category = models.CharField(max_length=100, blank=True, null=True)
+    stock_quantity = models.PositiveIntegerField(
+        blank=True, null=True,
+        help_text="Units left; leave empty to manage availability by hand"
+    )
+
+    search_vector = SearchVectorField(null=True, blank=True)
+
     def __str__(self):
         return self.name
     class Meta:
         verbose_name = "CDS Item"
         verbose_name_plural = "CDS Items"
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['name'], name='cds_item_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+class CDSCategory(models.Model):
+    """Normalized CDS category with item counts, kept in step with CDS_Item writes by signals"""
+    name = models.CharField(max_length=100, unique=True)
+    item_count = models.PositiveIntegerField(default=0)
+    available_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+    class Meta:
+        verbose_name = "CDS Category"
+        verbose_name_plural = "CDS Categories"
+        ordering = ['name']
+
+class CDSCatalogVersion(models.Model):
+    """Single-row counter bumped on every CDS_Item write so cached catalog snapshots can tell they are stale"""
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"CDS catalog v{self.version}"
 
 class CDSOrder(models.Model):
     PAYMENT_CHOICES = [
@@ -25,6 +59,7 @@ class CDSOrder(models.Model):
     DELIVERY_STATUS_CHOICES = [
         ('preparing', 'Preparing'),
         ('ready', 'Ready'),
+        ('cancelled', 'Cancelled'),
     ]
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -35,10 +70,23 @@ class CDSOrder(models.Model):
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's order history
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Owner order board, unfiltered and filtered by status
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['delivery_status', '-created_at', '-id']),
+        ]
+
 class CDSOrderItem(models.Model):
     order = models.ForeignKey(CDSOrder, related_name='items', on_delete=models.CASCADE)
     product = models.ForeignKey(CDS_Item, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Copied from the product when the order is placed, so order history
+    # keeps the price paid and can be read without joining CDS_Item
+    name = models.CharField(max_length=100, blank=True, default='')
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
 
     def __str__(self):
-        return f"{self.product.name} x {self.quantity}"
\ No newline at end of file
+        return f"{self.name} x {self.quantity}"
\ No newline at end of file
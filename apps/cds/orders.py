@@ -0,0 +1,219 @@
+"""
+Order submission pipeline for the CDS.
+
+A cart is validated and written with a fixed number of queries regardless
+of its size: one locking in_bulk lookup for the products, one conditional
+UPDATE for stock-tracked items, one INSERT for the order and one bulk INSERT
+for its lines, all inside a single transaction. Cancelling an order returns
+its quantities to stock the same way.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, Max, OuterRef, PositiveIntegerField, Q, Subquery, Value, When
+
+from .catalog import bump_catalog_version
+from .facets import adjust_category_counts
+from .models import CDSOrder, CDSOrderItem, CDS_Item
+
+
+class OrderRejected(Exception):
+    """Raised when a cart cannot be turned into an order"""
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.message = message
+        self.details = details
+
+
+def parse_cart_lines(lines):
+    """
+    Normalize [{'item_id': .., 'quantity': ..}, ...] into {item_id: quantity},
+    merging repeated items.
+    """
+    quantities = {}
+    for line in lines:
+        try:
+            item_id = int(line.get('item_id'))
+            quantity = int(line.get('quantity', 1))
+        except (AttributeError, TypeError, ValueError):
+            raise OrderRejected('Each item needs a numeric item_id and quantity.')
+        if quantity < 1:
+            raise OrderRejected('Quantity must be at least 1.', item_id=item_id)
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+    return quantities
+
+
+def place_order(user, lines, payment_method='cash'):
+    """
+    Create an order and its lines atomically. Prices come from the database
+    and every new order starts as 'preparing'.
+    """
+    quantities = parse_cart_lines(lines)
+    if not quantities:
+        raise OrderRejected('No items provided.')
+
+    with transaction.atomic():
+        # Lock the cart's rows in primary-key order so concurrent carts queue
+        # up instead of deadlocking, and stock is checked under the lock
+        products = CDS_Item.objects.select_for_update(no_key=True).order_by('item_id').in_bulk(list(quantities))
+
+        unknown = sorted(item_id for item_id in quantities if item_id not in products)
+        unavailable = sorted(item_id for item_id, product in products.items() if not product.availability)
+        if unknown or unavailable:
+            raise OrderRejected(
+                'Some items are unknown or unavailable.',
+                unknown_items=unknown,
+                unavailable_items=unavailable,
+            )
+
+        short = sorted(
+            item_id for item_id, product in products.items()
+            if product.stock_quantity is not None and product.stock_quantity < quantities[item_id]
+        )
+        if short:
+            raise OrderRejected('Not enough stock for some items.', out_of_stock_items=short)
+
+        take_stock(products, quantities)
+
+        total_amount = sum(
+            (products[item_id].price * quantity for item_id, quantity in quantities.items()),
+            Decimal('0.00')
+        )
+        order = CDSOrder.objects.create(
+            user=user,
+            payment_method=payment_method,
+            total_amount=total_amount,
+            delivery_status='preparing'
+        )
+        CDSOrderItem.objects.bulk_create([
+            CDSOrderItem(
+                order=order,
+                product=products[item_id],
+                quantity=quantity,
+                name=products[item_id].name,
+                unit_price=products[item_id].price
+            )
+            for item_id, quantity in quantities.items()
+        ])
+
+    return order
+
+
+def take_stock(products, quantities):
+    """
+    Decrement stock for tracked items in one conditional UPDATE and mark
+    items that hit zero as unavailable. Expects the rows to be locked.
+    """
+    tracked = {
+        item_id: quantity for item_id, quantity in quantities.items()
+        if products[item_id].stock_quantity is not None
+    }
+    if not tracked:
+        return
+
+    enough_stock = Q()
+    for item_id, quantity in tracked.items():
+        enough_stock |= Q(pk=item_id, stock_quantity__gte=quantity)
+
+    # Both CASEs see the pre-update stock, so stock == quantity means sold out
+    updated = CDS_Item.objects.filter(enough_stock).update(
+        stock_quantity=Case(
+            *[When(pk=item_id, then=F('stock_quantity') - quantity) for item_id, quantity in tracked.items()],
+            default=F('stock_quantity'),
+            output_field=PositiveIntegerField()
+        ),
+        availability=Case(
+            *[When(pk=item_id, stock_quantity=quantity, then=Value(False)) for item_id, quantity in tracked.items()],
+            default=F('availability')
+        ),
+    )
+    if updated != len(tracked):
+        raise OrderRejected('Not enough stock for some items.')
+
+    # update() skips the model signals, so keep the facets and the catalog
+    # snapshot in step for items that just sold out
+    sold_out = [products[item_id] for item_id, quantity in tracked.items() if products[item_id].stock_quantity == quantity]
+    for product in sold_out:
+        adjust_category_counts(product.category, available=-1)
+    if sold_out:
+        bump_catalog_version()
+
+
+def cancel_order(order):
+    """Mark an order cancelled and put its quantities back in stock, atomically"""
+    with transaction.atomic():
+        # Lock the order so two cancels cannot both restock it
+        order = CDSOrder.objects.select_for_update().get(pk=order.pk)
+        if order.delivery_status == 'cancelled':
+            raise OrderRejected('Order already cancelled.')
+
+        quantities = {}
+        for item_id, quantity in order.items.values_list('product_id', 'quantity'):
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+        products = CDS_Item.objects.select_for_update(no_key=True).order_by('item_id').in_bulk(list(quantities))
+        return_stock(products, quantities)
+
+        order.delivery_status = 'cancelled'
+        order.save(update_fields=['delivery_status'])
+    return order
+
+
+def return_stock(products, quantities):
+    """
+    Increment stock for tracked items in one UPDATE and make items that had
+    sold out available again. Expects the rows to be locked.
+    """
+    tracked = {
+        item_id: quantity for item_id, quantity in quantities.items()
+        if item_id in products and products[item_id].stock_quantity is not None
+    }
+    if not tracked:
+        return
+
+    # Only items take_stock switched off are switched back on; an item the
+    # owner disabled while it still had stock stays off
+    restocked = [
+        products[item_id] for item_id in tracked
+        if products[item_id].stock_quantity == 0 and not products[item_id].availability
+    ]
+    CDS_Item.objects.filter(pk__in=list(tracked), stock_quantity__isnull=False).update(
+        stock_quantity=Case(
+            *[When(pk=item_id, then=F('stock_quantity') + quantity) for item_id, quantity in tracked.items()],
+            default=F('stock_quantity'),
+            output_field=PositiveIntegerField()
+        ),
+        availability=Case(
+            When(pk__in=[product.pk for product in restocked], then=Value(True)),
+            default=F('availability')
+        ),
+    )
+
+    for product in restocked:
+        adjust_category_counts(product.category, available=1)
+    if restocked:
+        bump_catalog_version()
+
+
+def backfill_order_snapshots(batch_size=5000):
+    """
+    Copy product name and price onto order lines that have no snapshot yet,
+    one set-based UPDATE per id range. Yields (ids below, lines filled so
+    far) after each batch. Migration 0009 carries its own copy of the loop
+    over the historical models.
+    """
+    last_id = CDSOrderItem.objects.aggregate(last=Max('id'))['last'] or 0
+    product = CDS_Item.objects.filter(pk=OuterRef('product_id'))
+
+    updated = 0
+    for start in range(0, last_id + 1, batch_size):
+        # Already-filled lines are skipped
+        updated += CDSOrderItem.objects.filter(
+            id__gte=start,
+            id__lt=start + batch_size,
+            unit_price__isnull=True
+        ).update(
+            name=Subquery(product.values('name')[:1]),
+            unit_price=Subquery(product.values('price')[:1])
+        )
+        yield min(start + batch_size, last_id + 1), updated
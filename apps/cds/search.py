@@ -0,0 +1,43 @@
+"""
+Ranked CDS item search backed by Postgres full-text and trigram indexes.
+
+Full-text matches come from the GIN-indexed search_vector column; the
+trigram index on name catches partial words and typos ("chiken", "sandw").
+Both predicates are index-backed, so search cost tracks the number of
+matches rather than the size of the catalog.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import F, Q
+
+from .models import CDS_Item
+
+# Weight applied to trigram similarity (0..1) when blending it with the
+# full-text rank, so exact word hits still outrank fuzzy ones.
+TRIGRAM_WEIGHT = 0.5
+
+
+def search_vector_expression():
+    return (
+        SearchVector('name', weight='A') +
+        SearchVector('category', weight='B') +
+        SearchVector('description', weight='C')
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute search vectors for every row of the queryset in one UPDATE"""
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def ranked_item_ids(query, queryset=None):
+    """Return ids of items matching the query, best match first"""
+    queryset = CDS_Item.objects.all() if queryset is None else queryset
+    search_query = SearchQuery(query, search_type='websearch')
+    return list(
+        queryset.filter(
+            Q(search_vector=search_query) | Q(name__trigram_word_similar=query)
+        ).annotate(
+            score=SearchRank(F('search_vector'), search_query) +
+                  TrigramWordSimilarity(query, 'name') * TRIGRAM_WEIGHT
+        ).order_by('-score', '-item_id').values_list('item_id', flat=True)
+    )
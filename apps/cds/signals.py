@@ -0,0 +1,45 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+from apps.common.landing import CDS_SECTIONS, invalidate_sections
+from .models import CDS_Item
+from .catalog import bump_catalog_version
+from .facets import adjust_category_counts, move_item_between_categories
+from .search import update_search_vectors
+
+@receiver(post_save, sender=CDS_Item)
+@receiver(post_delete, sender=CDS_Item)
+def invalidate_catalog_snapshot(sender, instance, **kwargs):
+    bump_catalog_version()
+
+@receiver(post_save, sender=CDS_Item)
+@receiver(post_delete, sender=CDS_Item)
+def expire_landing_sections(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_sections(CDS_SECTIONS))
+
+@receiver(pre_save, sender=CDS_Item)
+def remember_previous_facet(sender, instance, **kwargs):
+    instance._previous_facet = None
+    if instance.pk is not None:
+        instance._previous_facet = CDS_Item.objects.filter(pk=instance.pk).values_list(
+            'category', 'availability'
+        ).first()
+
+@receiver(post_save, sender=CDS_Item)
+def update_category_facets(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_facet', None)
+    if created or previous is None:
+        adjust_category_counts(instance.category, items=1, available=int(instance.availability))
+    else:
+        move_item_between_categories(previous[0], previous[1], instance.category, instance.availability)
+
+@receiver(post_delete, sender=CDS_Item)
+def remove_from_category_facets(sender, instance, **kwargs):
+    adjust_category_counts(instance.category, items=-1, available=-int(instance.availability))
+
+@receiver(post_save, sender=CDS_Item)
+def update_search_vector(sender, instance, created, **kwargs):
+    if kwargs.get('update_fields') and 'search_vector' in kwargs.get('update_fields', []):
+        return
+
+    update_search_vectors(CDS_Item.objects.filter(pk=instance.pk))
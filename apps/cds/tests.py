@@ -1,3 +1,414 @@
-from django.test import TestCase
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from apps.accounts.models import User
+from .facets import rebuild_category_facets
+from .models import CDS_Item, CDSCategory, CDSOrder, CDSOrderItem
+from .orders import place_order
+from .views import cancel_cds_order, submit_cds_order
+
+
+def submit(user, item, quantity=1, **extra):
+    request = APIRequestFactory().post(
+        '/api/cds/submit_order/',
+        {'items': [{'item_id': item.item_id, 'quantity': quantity}], 'payment_method': 'cash', **extra},
+        format='json'
+    )
+    force_authenticate(request, user=user)
+    return submit_cds_order(request)
+
+
+def cancel(user, order_id):
+    request = APIRequestFactory().post('/api/cds/cancel_order/', {'order_id': order_id}, format='json')
+    force_authenticate(request, user=user)
+    return cancel_cds_order(request)
+
+
+class CatalogSnapshotTests(TestCase):
+
+    def setUp(self):
+        for name, price, category, availability in [
+            ('Chicken Biryani', '120.00', 'Food', True),
+            ('Iced Coffee', '60.00', 'Drinks', True),
+            ('Samosa', '15.00', 'Snacks', True),
+            ('Beef Tehari', '140.00', 'Food', False),
+            ('Lemonade', '40.00', 'Drinks', True),
+        ]:
+            CDS_Item.objects.create(
+                name=name, description='Menu item', price=Decimal(price), category=category, availability=availability
+            )
+        # Catalog versions bumped by earlier tests were rolled back, so a
+        # snapshot left over from them could carry a matching version
+        patcher = mock.patch('apps.cds.catalog._snapshot', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def names(self, **params):
+        response = self.client.get('/api/cds/items/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()['items']]
+
+    def test_filters_and_sorts(self):
+        self.assertEqual(self.names(sort_by='price_asc'), [
+            'Samosa', 'Lemonade', 'Iced Coffee', 'Chicken Biryani', 'Beef Tehari'
+        ])
+        self.assertEqual(self.names(category='Food', sort_by='price_desc'), ['Beef Tehari', 'Chicken Biryani'])
+        self.assertEqual(self.names(availability='true', min_price='40', max_price='120'), [
+            'Lemonade', 'Iced Coffee', 'Chicken Biryani'
+        ])
+
+    def test_pages_count_the_filtered_rows(self):
+        response = self.client.get('/api/cds/items/', {'page': 2, 'page_size': 2, 'sort_by': 'price_asc'})
+        data = response.json()
+        self.assertEqual((data['total_count'], data['total_pages'], data['current_page']), (5, 3, 2))
+        self.assertEqual([item['name'] for item in data['items']], ['Iced Coffee', 'Chicken Biryani'])
+
+    def test_fresh_snapshot_costs_one_version_lookup(self):
+        self.names()
+        with self.assertNumQueries(1):
+            self.names(sort_by='price_desc')
+
+    def test_item_writes_are_never_served_stale(self):
+        self.names()
+        item = CDS_Item.objects.get(name='Samosa')
+        item.price = Decimal('500.00')
+        item.save()
+        self.assertEqual(self.names(sort_by='price_desc')[0], 'Samosa')
+
+        item.delete()
+        self.assertNotIn('Samosa', self.names())
+
+
+class StockTrackingTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        self.item = CDS_Item.objects.create(
+            name='Chicken Biryani', description='Lunch special', price=Decimal('120.00'),
+            category='Food', stock_quantity=3
+        )
+
+    def test_order_decrements_stock(self):
+        response = submit(self.user, self.item, quantity=2)
+        self.assertEqual(response.status_code, 201)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 1)
+        self.assertTrue(self.item.availability)
+
+    def test_selling_out_flips_availability_and_facets(self):
+        submit(self.user, self.item, quantity=3)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 0)
+        self.assertFalse(self.item.availability)
+        self.assertEqual(CDSCategory.objects.get(name='Food').available_count, 0)
+
+    def test_order_larger_than_stock_is_rejected(self):
+        response = submit(self.user, self.item, quantity=4)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['out_of_stock_items'], [self.item.item_id])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 3)
+
+    def test_untracked_items_are_not_limited(self):
+        item = CDS_Item.objects.create(name='Tea', description='Hot tea', price=Decimal('10.00'), category='Drinks')
+        response = submit(self.user, item, quantity=500)
+        self.assertEqual(response.status_code, 201)
+        item.refresh_from_db()
+        self.assertIsNone(item.stock_quantity)
+        self.assertTrue(item.availability)
+
+
+    def test_client_cannot_choose_the_delivery_status(self):
+        response = submit(self.user, self.item, quantity=2, delivery_status='cancelled')
+        order = CDSOrder.objects.get(pk=response.data['order_id'])
+        self.assertEqual(order.delivery_status, 'preparing')
+        # So cancelling it still gives the stock back
+        cancel(self.user, order.pk)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 3)
+
+    def test_cancel_returns_stock_and_availability(self):
+        order_id = submit(self.user, self.item, quantity=3).data['order_id']
+        response = cancel(self.user, order_id)
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 3)
+        self.assertTrue(self.item.availability)
+        self.assertEqual(CDSCategory.objects.get(name='Food').available_count, 1)
+        self.assertEqual(CDSOrder.objects.get(pk=order_id).delivery_status, 'cancelled')
+
+    def test_cancelling_twice_restocks_once(self):
+        order_id = submit(self.user, self.item, quantity=2).data['order_id']
+        cancel(self.user, order_id)
+        response = cancel(self.user, order_id)
+        self.assertEqual(response.status_code, 400)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 3)
+
+    def test_cancel_keeps_owner_disabled_items_off(self):
+        order_id = submit(self.user, self.item, quantity=1).data['order_id']
+        self.item.refresh_from_db()
+        self.item.availability = False
+        self.item.save()
+        cancel(self.user, order_id)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock_quantity, 3)
+        self.assertFalse(self.item.availability)
+
+
+class OrderPipelineTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        self.items = [
+            CDS_Item.objects.create(
+                name=f'Item {index}', description='Lunch', price=Decimal('50.00'), category='Food',
+                stock_quantity=100 if index % 2 else None
+            )
+            for index in range(10)
+        ]
+
+    def lines(self, items):
+        return [{'item_id': item.item_id, 'quantity': 2} for item in items]
+
+    def test_query_count_does_not_grow_with_the_cart(self):
+        # Savepoint, locking lookup, stock UPDATE, order INSERT, lines INSERT, release
+        for items in (self.items[1:2], self.items):
+            with self.subTest(lines=len(items)), self.assertNumQueries(6):
+                place_order(self.user, self.lines(items))
+
+    def test_unknown_and_unavailable_items_are_rejected(self):
+        unavailable = self.items[3]
+        unavailable.availability = False
+        unavailable.save()
+        stock_before = dict(CDS_Item.objects.values_list('item_id', 'stock_quantity'))
+
+        request = APIRequestFactory().post(
+            '/api/cds/submit_order/',
+            {'items': self.lines(self.items[:3]) + self.lines([unavailable]) + [{'item_id': 999999, 'quantity': 1}]},
+            format='json'
+        )
+        force_authenticate(request, user=self.user)
+        response = submit_cds_order(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['unknown_items'], [999999])
+        self.assertEqual(response.data['unavailable_items'], [unavailable.item_id])
+        self.assertFalse(CDSOrder.objects.exists())
+        self.assertEqual(dict(CDS_Item.objects.values_list('item_id', 'stock_quantity')), stock_before)
+
+    def test_backfill_fills_only_missing_snapshots(self):
+        order = place_order(self.user, self.lines(self.items[:3]))
+        old, kept = order.items.order_by('id')[:2]
+        CDSOrderItem.objects.filter(pk=old.pk).update(name='', unit_price=None)
+        CDSOrderItem.objects.filter(pk=kept.pk).update(unit_price=Decimal('45.00'))
+
+        call_command('backfill_cds_order_snapshots', batch_size=1, stdout=StringIO())
+
+        old.refresh_from_db()
+        kept.refresh_from_db()
+        self.assertEqual((old.name, old.unit_price), (old.product.name, Decimal('50.00')))
+        self.assertEqual(kept.unit_price, Decimal('45.00'))
+
+
+class OrderHistoryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        other = User.objects.create_user(email='other@iut-dhaka.edu', password='Campus#1234', name='Other Student')
+        items = [
+            CDS_Item.objects.create(name=f'Item {index}', description='Lunch', price=Decimal('20.00'), category='Food')
+            for index in range(4)
+        ]
+        # Orders with one to four lines each
+        self.orders = [
+            place_order(self.user, [{'item_id': item.item_id, 'quantity': 1} for item in items[:size]])
+            for size in (1, 2, 3, 4, 1)
+        ]
+        place_order(other, [{'item_id': items[0].item_id, 'quantity': 1}])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_walk_own_orders_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get('/api/cds/user_orders/', params).json()
+            seen.extend(order['order_id'] for order in data['orders'])
+            if not data['has_more']:
+                break
+            cursor = data['next_cursor']
+        self.assertEqual(seen, [order.id for order in reversed(self.orders)])
+
+    def test_page_costs_two_queries_whatever_its_lines(self):
+        # The page of orders, then one prefetch for all their lines
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/cds/user_orders/', {'page_size': 10}).json()
+        self.assertEqual([len(order['items']) for order in data['orders']], [1, 4, 3, 2, 1])
+        line = data['orders'][1]['items'][0]
+        self.assertEqual((line['name'], line['quantity'], line['price']), ('Item 0', 1, 20.0))
+
+    def test_summary_skips_the_lines(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/cds/user_orders/', {'page_size': 10, 'summary': '1'}).json()
+        self.assertEqual([order['items_count'] for order in data['orders']], [1, 4, 3, 2, 1])
+        self.assertNotIn('items', data['orders'][0])
+
+
+class OrderBoardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='owner@iut-dhaka.edu', password='Campus#1234', name='CDS Owner', role='cds_owner'
+        )
+        cls.student = User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        item = CDS_Item.objects.create(name='Samosa', description='Snack', price=Decimal('15.00'), category='Snacks')
+        # (day in October, status, payment method, lines)
+        for day, delivery_status, payment_method, lines in [
+            (1, 'preparing', 'cash', 1),
+            (2, 'ready', 'cash', 2),
+            (3, 'ready', 'bkash', 3),
+            (4, 'cancelled', 'cash', 1),
+            (5, 'preparing', 'bkash', 2),
+        ]:
+            order = CDSOrder.objects.create(
+                user=cls.student, total_amount=Decimal('15.00') * lines,
+                payment_method=payment_method, delivery_status=delivery_status
+            )
+            CDSOrder.objects.filter(pk=order.pk).update(
+                created_at=timezone.make_aware(datetime(2026, 10, day, 12))
+            )
+            CDSOrderItem.objects.bulk_create([
+                CDSOrderItem(order=order, product=item, quantity=1, name=item.name, unit_price=item.price)
+                for _ in range(lines)
+            ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def board(self, **params):
+        response = self.client.get('/api/cds/owner/orders/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.board()
+        self.assertEqual([order['items_count'] for order in data['orders']], [2, 1, 3, 2, 1])
+        self.assertEqual(data['orders'][0]['user_name'], 'Test Student')
+        self.assertEqual(data['status_totals'], {'preparing': 2, 'ready': 2, 'cancelled': 1})
+
+    def test_totals_ignore_the_status_filter_only(self):
+        data = self.board(status='ready', payment_method='cash')
+        self.assertEqual([order['items_count'] for order in data['orders']], [2])
+        self.assertEqual(data['status_totals'], {'preparing': 1, 'ready': 1, 'cancelled': 1})
+
+    def test_date_range_is_inclusive(self):
+        data = self.board(date_from='2026-10-02', date_to='2026-10-04')
+        self.assertEqual([order['items_count'] for order in data['orders']], [1, 3, 2])
+
+    def test_totals_for_an_empty_page(self):
+        data = self.board(status='cancelled', payment_method='bkash')
+        self.assertEqual(data['orders'], [])
+        self.assertEqual(data['status_totals'], {'preparing': 1, 'ready': 1, 'cancelled': 0})
+
+    def test_pages_follow_the_cursor(self):
+        first = self.board(page_size=3)
+        second = self.board(page_size=3, cursor=first['next_cursor'])
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        ids = [order['order_id'] for order in first['orders'] + second['orders']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 5)
+
+    def test_bad_filters_are_rejected(self):
+        for params in ({'status': 'lost'}, {'date_from': '18/10/2026'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/cds/owner/orders/', params).status_code, 400)
+
+    def test_students_cannot_see_the_board(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        self.assertEqual(client.get('/api/cds/owner/orders/').status_code, 403)
+
+
+class CategoryFacetTests(TestCase):
+
+    def setUp(self):
+        for name in ('Biryani', 'Tehari'):
+            CDS_Item.objects.create(name=name, description='Lunch', price=Decimal('120.00'), category='Food')
+        CDS_Item.objects.create(
+            name='Samosa', description='Snack', price=Decimal('15.00'), category=' Snacks ', availability=False
+        )
+
+    def test_drifted_counts_do_not_fail_item_writes(self):
+        # A write that skipped the signals left the count too low
+        CDSCategory.objects.filter(name='Food').update(item_count=0, available_count=0)
+        CDS_Item.objects.filter(name='Biryani').get().delete()
+        category = CDSCategory.objects.get(name='Food')
+        self.assertEqual((category.item_count, category.available_count), (0, 0))
+
+    def test_rebuild_restores_counts(self):
+        CDSCategory.objects.update(item_count=7, available_count=7)
+        CDSCategory.objects.create(name='Drinks', item_count=3, available_count=3)
+        self.assertEqual(rebuild_category_facets(), 2)
+        self.assertEqual(
+            set(CDSCategory.objects.values_list('name', 'item_count', 'available_count')),
+            {('Food', 2, 2), ('Snacks', 1, 0), ('Drinks', 0, 0)}
+        )
+
+
+class ConcurrentStockStressTests(TransactionTestCase):
+    """Fire parallel submit_cds_order calls at one tracked item and check nothing is oversold"""
+    WORKERS = 12
+    ORDERS_PER_WORKER = 10
+    STOCK = 50
+
+    def setUp(self):
+        self.item = CDS_Item.objects.create(
+            name='Chicken Biryani', description='Lunch special', price=Decimal('120.00'),
+            category='Food', stock_quantity=self.STOCK
+        )
+        self.users = [
+            User.objects.create_user(email=f'student{n}@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+            for n in range(self.WORKERS)
+        ]
+
+    def place_orders(self, user):
+        accepted = 0
+        try:
+            for _ in range(self.ORDERS_PER_WORKER):
+                if submit(user, self.item).status_code == 201:
+                    accepted += 1
+        finally:
+            connection.close()
+        return accepted
+
+    def test_parallel_orders_never_oversell(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            accepted = sum(pool.map(self.place_orders, self.users))
+        elapsed = time.perf_counter() - started
+
+        self.item.refresh_from_db()
+        sold = CDSOrderItem.objects.filter(product=self.item).aggregate(total=Sum('quantity'))['total']
+        self.assertEqual(accepted, self.STOCK)
+        self.assertEqual(sold, self.STOCK)
+        self.assertEqual(self.item.stock_quantity, 0)
+        self.assertFalse(self.item.availability)
+        # Row locks serialize orders for the same item; the whole burst of
+        # WORKERS * ORDERS_PER_WORKER submissions should still clear quickly
+        self.assertLess(elapsed, 30)
@@ -1,18 +1,28 @@
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date
+from datetime import datetime, timedelta
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import CDSOrder, CDSOrderItem, CDS_Item
+from .models import CDSOrder, CDS_Item, CDSCategory
+from .catalog import get_catalog_snapshot
+from .search import ranked_item_ids
+from .orders import cancel_order, place_order, OrderRejected
+from apps.common.pagination import KeysetPaginator, get_page_size, InvalidCursor
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Count, Subquery
+from decimal import Decimal
 from apps.accounts.decorators import role_required
 import json
 
+def _as_float(value):
+    """Float for JSON output, keeping None for order lines not yet backfilled"""
+    return float(value) if value is not None else None
+
 @require_http_methods(["GET"])
 def get_cds_items(request):
     try:
@@ -26,50 +36,32 @@ def get_cds_items(request):
         sort_by = request.GET.get('sort_by') 
         search_query = request.GET.get('search', '').strip()
 
-
-        items_qs = CDS_Item.objects.all()
-        
-        if search_query:
-            items_qs = items_qs.filter(
-                Q(name__icontains=search_query) | Q(category__icontains=search_query)
-        )
-
-        if sort_by == 'price_asc':
-            items_qs = items_qs.order_by('price')
-        elif sort_by == 'price_desc':
-            items_qs = items_qs.order_by('-price')
-        else:
-            items_qs = items_qs.order_by('-item_id')
-
-        if min_price:
-            items_qs = items_qs.filter(price__gte=float(min_price))
-        if max_price:
-            items_qs = items_qs.filter(price__lte=float(max_price))
-
-        if category:    
-            items_qs = items_qs.filter(category=category)
-
+        available = None
         if availability is not None:
             if availability.lower() in ["1", "true", "yes"]:
-                items_qs = items_qs.filter(availability=True)
+                available = True
             elif availability.lower() in ["0", "false", "no"]:
-                items_qs = items_qs.filter(availability=False)
+                available = False
+
+        # Search runs against the full-text/trigram indexes; everything else
+        # is filtered and sorted against the in-memory catalog
+        ranked_ids = ranked_item_ids(search_query) if search_query else None
+        snapshot = get_catalog_snapshot()
+        items = snapshot.filter(
+            ids=ranked_ids,
+            category=category,
+            min_price=Decimal(min_price) if min_price else None,
+            max_price=Decimal(max_price) if max_price else None,
+            availability=available,
+            sort_by=sort_by,
+        )
 
         # --- Pagination ---
-        paginator = Paginator(items_qs, page_size)
+        paginator = Paginator(items, page_size)
         page_obj = paginator.get_page(page)
 
         items_list = [
-            {
-                "item_id": item.item_id,
-                "name": item.name,
-                "category": item.category,
-                "description": item.description,
-                "price": float(item.price),
-                "image": item.image,
-                "availability": item.availability,
-                "sort_by": sort_by,
-            }
+            dict(item.as_dict(), sort_by=sort_by)
             for item in page_obj.object_list
         ]
 
@@ -93,12 +85,16 @@ def get_cds_items(request):
  
 @require_http_methods(["GET"])
 def get_cds_categories(request):
-    cats = CDS_Item.objects.values_list('category', flat=True)
-    unique_cats = set()
-    for c in cats:
-        if c:
-            unique_cats.add(c.strip())
-    return JsonResponse({'categories': sorted(unique_cats)})
+    """List categories with item counts from the maintained facet table"""
+    facets = list(
+        CDSCategory.objects.filter(item_count__gt=0)
+        .order_by('name')
+        .values('name', 'item_count', 'available_count')
+    )
+    return JsonResponse({
+        'categories': [facet['name'] for facet in facets],
+        'facets': facets,
+    })
 
 
 @require_http_methods(["GET"])
@@ -116,6 +112,7 @@ def get_cds_item_detail(request, item_id):
             'image': item.image,
             'availability': item.availability,
             'category': item.category,
+            'stock_quantity': item.stock_quantity,
         }
         
         return JsonResponse({
@@ -196,46 +193,61 @@ def submit_cds_order(request):
     payment_method = request.data.get('payment_method', 'cash')
     if not items:
         return Response({'error': 'No items provided.'}, status=status.HTTP_400_BAD_REQUEST)
-    total_amount = 0
-    order_items = []
-    for item in items:
-        try:
-            product = CDS_Item.objects.get(pk=item.get('item_id'))
-        except CDS_Item.DoesNotExist:
-            continue
-        quantity = item.get('quantity', 1)
-        total_amount += float(product.price) * quantity
-        order_items.append((product, quantity))
-    delivery_status = request.data.get('delivery_status', 'preparing')
-    order = CDSOrder.objects.create(user=user, payment_method=payment_method, total_amount=total_amount, delivery_status=delivery_status)
-    for product, quantity in order_items:
-        CDSOrderItem.objects.create(order=order, product=product, quantity=quantity)
-    return Response({'success': True, 'order_id': order.id, 'total_amount': total_amount}, status=status.HTTP_201_CREATED)
+    try:
+        # The status is never taken from the client: an order posted as
+        # 'cancelled' would take stock that cancelling never gives back
+        order = place_order(user, items, payment_method=payment_method)
+    except OrderRejected as e:
+        return Response({'error': e.message, **e.details}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'success': True, 'order_id': order.id, 'total_amount': float(order.total_amount)}, status=status.HTTP_201_CREATED)
 # API endpoint to get user's CDS orders
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_cds_orders(request):
+    """
+    Cursor-paginated order history, newest first.
+    ?summary=1 returns item counts instead of the line items.
+    """
     user = request.user
-    orders = CDSOrder.objects.filter(user=user).order_by('-created_at')
+    summary = request.query_params.get('summary', '').lower() in ['1', 'true', 'yes']
+    orders = CDSOrder.objects.filter(user=user)
+    if summary:
+        orders = orders.annotate(items_count=Count('items'))
+    else:
+        orders = orders.prefetch_related('items')
+
+    try:
+        page = KeysetPaginator(
+            orders,
+            page_size=get_page_size(request),
+            ordering=['-created_at', '-id'],
+        ).page(request.query_params.get('cursor'))
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
     data = []
-    for order in orders:
-        data.append({
+    for order in page:
+        entry = {
             'order_id': order.id,
             'total_amount': float(order.total_amount),
             'created_at': order.created_at,
             'payment_method': order.payment_method,
             'delivery_status': order.delivery_status or 'pending',
-            'items': [
+        }
+        if summary:
+            entry['items_count'] = order.items_count
+        else:
+            entry['items'] = [
                 {
-                    'item_id': item.product.item_id,
-                    'name': item.product.name,
+                    'item_id': item.product_id,
+                    'name': item.name,
                     'quantity': item.quantity,
-                    'price': float(item.product.price),
+                    'price': _as_float(item.unit_price),
                 }
                 for item in order.items.all()
             ]
-        })
-    return Response({'orders': data})
+        data.append(entry)
+    return Response({'orders': data, 'next_cursor': page.next_cursor, 'has_more': page.has_more})
 
 # Cancel CDS order within 3 minutes of creation
 @api_view(['POST'])
@@ -250,10 +262,10 @@ def cancel_cds_order(request):
     # Check if within 3 minutes
     if timezone.now() - order.created_at > timedelta(minutes=3):
         return Response({'error': 'Order can only be cancelled within 3 minutes of placing.'}, status=status.HTTP_400_BAD_REQUEST)
-    if order.delivery_status == 'cancelled':
-        return Response({'error': 'Order already cancelled.'}, status=status.HTTP_400_BAD_REQUEST)
-    order.delivery_status = 'cancelled'
-    order.save()
+    try:
+        cancel_order(order)
+    except OrderRejected as e:
+        return Response({'error': e.message, **e.details}, status=status.HTTP_400_BAD_REQUEST)
     return Response({'success': True, 'message': 'Order cancelled.'})
 
   
@@ -273,19 +285,25 @@ def manage_cds_items(request):
             'image': item.image,
             'availability': item.availability,
             'category': item.category,
+            'stock_quantity': item.stock_quantity,
         } for item in items]
         return Response(data)
     
     elif request.method == 'POST':
         try:
             data = request.data
+            stock_quantity = data.get('stock_quantity')
+            availability = data.get('availability', True)
+            if stock_quantity is not None and 'availability' not in data:
+                availability = int(stock_quantity) > 0
             item = CDS_Item.objects.create(
                 name=data.get('name'),
                 description=data.get('description'),
                 price=data.get('price'),
                 image=data.get('image', ''),
-                availability=data.get('availability', True),
-                category=data.get('category', '')
+                availability=availability,
+                category=data.get('category', ''),
+                stock_quantity=stock_quantity
             )
             return Response({
                 'item_id': item.item_id,
@@ -295,6 +313,7 @@ def manage_cds_items(request):
                 'image': item.image,
                 'availability': item.availability,
                 'category': item.category,
+                'stock_quantity': item.stock_quantity,
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -318,6 +337,12 @@ def manage_cds_item(request, item_id):
             item.image = data.get('image', item.image)
             item.availability = data.get('availability', item.availability)
             item.category = data.get('category', item.category)
+            if 'stock_quantity' in data:
+                item.stock_quantity = data.get('stock_quantity')
+                # Restocking (or emptying) a tracked item sets its availability
+                # unless the owner chose one explicitly
+                if item.stock_quantity is not None and 'availability' not in data:
+                    item.availability = int(item.stock_quantity) > 0
             item.save()
             
             return Response({
@@ -328,6 +353,7 @@ def manage_cds_item(request, item_id):
                 'image': item.image,
                 'availability': item.availability,
                 'category': item.category,
+                'stock_quantity': item.stock_quantity,
             })
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -336,12 +362,71 @@ def manage_cds_item(request, item_id):
         item.delete()
         return Response({'message': 'Item deleted successfully'}, status=status.HTTP_200_OK)
 
+def _parse_board_date(value, end_of_day=False):
+    """Turn a YYYY-MM-DD query param into an aware datetime bound"""
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    if end_of_day:
+        day += timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @role_required(['cds_owner'])
 def get_all_cds_orders(request):
-    """Get all CDS orders for owner to manage"""
-    orders = CDSOrder.objects.all().order_by('-created_at')
+    """
+    Paginated order board for the owner.
+    Filters: status, payment_method, date_from/date_to (YYYY-MM-DD).
+    status_totals counts the orders per status for the other filters.
+    """
+    orders = CDSOrder.objects.all()
+    try:
+        if request.query_params.get('date_from'):
+            orders = orders.filter(created_at__gte=_parse_board_date(request.query_params['date_from']))
+        if request.query_params.get('date_to'):
+            orders = orders.filter(created_at__lt=_parse_board_date(request.query_params['date_to'], end_of_day=True))
+    except ValueError:
+        return Response({'error': 'Dates must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+
+    payment_method = request.query_params.get('payment_method')
+    if payment_method:
+        orders = orders.filter(payment_method=payment_method)
+
+    statuses = [choice for choice, _ in CDSOrder.DELIVERY_STATUS_CHOICES]
+    # Per-status totals ride along on every row as uncorrelated subqueries,
+    # which Postgres evaluates once per statement
+    totals = {
+        f'total_{choice}': Subquery(
+            orders.filter(delivery_status=choice).order_by().values('delivery_status')
+            .annotate(total=Count('id')).values('total')[:1]
+        )
+        for choice in statuses
+    }
+
+    board = orders
+    delivery_status = request.query_params.get('status')
+    if delivery_status:
+        if delivery_status not in statuses:
+            return Response({'error': 'Invalid delivery status'}, status=status.HTTP_400_BAD_REQUEST)
+        board = board.filter(delivery_status=delivery_status)
+    board = board.select_related('user').annotate(items_count=Count('items'), **totals)
+
+    try:
+        page = KeysetPaginator(
+            board,
+            page_size=get_page_size(request, default=50, maximum=200),
+            ordering=['-created_at', '-id'],
+        ).page(request.query_params.get('cursor'))
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if page.rows:
+        status_totals = {choice: getattr(page.rows[0], f'total_{choice}') or 0 for choice in statuses}
+    else:
+        counted = dict(orders.order_by().values_list('delivery_status').annotate(total=Count('id')))
+        status_totals = {choice: counted.get(choice, 0) for choice in statuses}
+
     data = [{
         'order_id': order.id,
         'user_name': order.user.name,
@@ -350,10 +435,15 @@ def get_all_cds_orders(request):
         'created_at': order.created_at,
         'payment_method': order.payment_method,
         'delivery_status': order.delivery_status,
-        'items_count': order.items.count()
-    } for order in orders]
-    
-    return Response(data)
+        'items_count': order.items_count
+    } for order in page]
+
+    return Response({
+        'orders': data,
+        'next_cursor': page.next_cursor,
+        'has_more': page.has_more,
+        'status_totals': status_totals,
+    })
 
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
@@ -386,14 +476,14 @@ def update_cds_order_status(request, order_id):
 def get_cds_order_details_owner(request, order_id):
     """Get detailed order information for owner"""
     try:
-        order = CDSOrder.objects.get(id=order_id)
+        order = CDSOrder.objects.select_related('user').get(id=order_id)
         items = order.items.all()
         
         items_data = [{
-            'item_name': item.product.name,
+            'item_name': item.name,
             'quantity': item.quantity,
-            'unit_price': float(item.product.price),
-            'subtotal': float(item.product.price) * item.quantity
+            'unit_price': _as_float(item.unit_price),
+            'subtotal': _as_float(item.unit_price * item.quantity if item.unit_price is not None else None)
         } for item in items]
         
         data = {
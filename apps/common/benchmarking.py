@@ -0,0 +1,60 @@
+"""
+Shared pieces of the search benchmark commands.
+
+Each benchmark seeds a synthetic catalog inside a transaction that is rolled
+back, so it can run against a development database without leaving rows
+behind. Only a fixed number of seeded rows carry real words; the rest get
+filler names, so the result set stays the same size while the catalog
+grows and any growth in latency comes from scanning.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+SYLLABLES = ['ka', 'lo', 'mi', 'zu', 're', 'ta', 'vo', 'xi', 'pe', 'qu', 'ny', 'do', 'fa', 'gi', 'ju']
+ROLLBACK_NOTICE = 'Synthetic rows are created inside a transaction that is rolled back.'
+
+
+def filler_name():
+    """Two made-up words that match none of the benchmark queries"""
+    return ' '.join(
+        ''.join(random.choice(SYLLABLES) for _ in range(3))
+        for _ in range(2)
+    ).title()
+
+
+def sample_name(index, matching_rows, adjectives, nouns):
+    """A real 'adjective noun' name for the first matching_rows rows, filler after"""
+    if index < matching_rows:
+        return f'{random.choice(adjectives)} {random.choice(nouns)}'
+    return filler_name()
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def analyze(model):
+    """Refresh planner statistics after seeding, so plans match a real table"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+
+def measure(run, queries, repeat):
+    """Time run(query) repeat times per query after one warm-up; returns (p50, p95) in ms"""
+    timings = []
+    for query in queries:
+        run(query)  # warm up
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
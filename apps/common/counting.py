@@ -0,0 +1,155 @@
+"""
+Count strategies for paginated listings.
+
+An exact COUNT(*) has to visit every matching row, which dominates the cost
+of a page once the filtered set is large. Listings can pick a cheaper mode:
+
+    exact      COUNT(*) over the whole result
+    capped     count at most `cap` rows and report "cap+" beyond that
+    estimated  take the row estimate from the Postgres planner (EXPLAIN),
+               falling back to an exact count for small results
+    auto       estimated for unfiltered querysets, where the planner
+               estimate comes straight from table statistics, capped otherwise
+
+Inexact counts are flagged so clients can show "1000+" or "~12000" instead
+of a precise total.
+"""
+import json
+from functools import cached_property
+
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+
+EXACT = 'exact'
+CAPPED = 'capped'
+ESTIMATED = 'estimated'
+AUTO = 'auto'
+COUNT_STRATEGIES = (EXACT, CAPPED, ESTIMATED, AUTO)
+
+DEFAULT_COUNT_CAP = 1000
+# Below this many estimated rows an exact count is cheap and more useful
+DEFAULT_EXACT_BELOW = 1000
+
+
+class CountResult:
+    __slots__ = ('value', 'exact', 'capped')
+
+    def __init__(self, value, exact=True, capped=False):
+        self.value = value
+        self.exact = exact
+        self.capped = capped
+
+    @property
+    def display(self):
+        if self.capped:
+            return f'{self.value}+'
+        if not self.exact:
+            return f'~{self.value}'
+        return str(self.value)
+
+
+def exact_count(queryset):
+    if not hasattr(queryset, 'query'):
+        return CountResult(len(queryset))
+    return CountResult(queryset.count())
+
+
+def capped_count(queryset, cap=DEFAULT_COUNT_CAP):
+    """Count with LIMIT cap + 1 so the scan stops once the cap is passed"""
+    if not hasattr(queryset, 'query'):
+        counted = len(queryset)
+    else:
+        counted = queryset.order_by()[:cap + 1].count()
+    if counted > cap:
+        return CountResult(cap, exact=False, capped=True)
+    return CountResult(counted)
+
+
+def planner_estimate(queryset):
+    """Row estimate for the queryset from EXPLAIN, or None if unavailable"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset, exact_below=DEFAULT_EXACT_BELOW):
+    if not hasattr(queryset, 'query'):
+        return exact_count(queryset)
+    estimate = planner_estimate(queryset)
+    if estimate is None or estimate < exact_below:
+        return exact_count(queryset)
+    return CountResult(estimate, exact=False)
+
+
+def count_queryset(queryset, strategy=EXACT, cap=DEFAULT_COUNT_CAP, exact_below=DEFAULT_EXACT_BELOW):
+    if strategy == AUTO:
+        unfiltered = hasattr(queryset, 'query') and not queryset.query.where
+        strategy = ESTIMATED if unfiltered else CAPPED
+    if strategy == CAPPED:
+        return capped_count(queryset, cap)
+    if strategy == ESTIMATED:
+        return estimated_count(queryset, exact_below)
+    if strategy == EXACT:
+        return exact_count(queryset)
+    raise ValueError(f'Unknown count strategy: {strategy}')
+
+
+class CountStrategyPage(Page):
+
+    def has_next(self):
+        if self.paginator.count_result.exact:
+            return super().has_next()
+        # The total is only approximate; a full page means there may be more
+        return len(self) == self.paginator.per_page
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Django Paginator whose count comes from a count strategy. With an
+    inexact count, pages past the reported total can still be requested.
+    A known_count the caller has already computed is used as the exact total.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 count_strategy=EXACT, count_cap=DEFAULT_COUNT_CAP, exact_below=DEFAULT_EXACT_BELOW,
+                 known_count=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.count_strategy = count_strategy
+        self.count_cap = count_cap
+        self.exact_below = exact_below
+        self.known_count = known_count
+
+    @cached_property
+    def count_result(self):
+        if self.known_count is not None:
+            return CountResult(self.known_count)
+        return count_queryset(self.object_list, self.count_strategy, self.count_cap, self.exact_below)
+
+    @cached_property
+    def count(self):
+        return self.count_result.value
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_result.exact or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        if self.count_result.exact:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return CountStrategyPage(*args, **kwargs)
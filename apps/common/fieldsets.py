@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets for read endpoints.
+
+?fields=a,b keeps only the listed serializer fields and ?exclude=c drops
+fields; unknown names are ignored. Dropped fields are removed from the
+serializer, so their SerializerMethodFields never run, and
+narrow_queryset() turns the remaining fields into only()/select_related()
+so the columns they do not need are not fetched either.
+
+Write requests always use the full serializer.
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _names(params, param):
+    value = params.get(param)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(request, available):
+    """The subset of available field names the request asks for, or None for all"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    fields, exclude = _names(params, FIELDS_PARAM), _names(params, EXCLUDE_PARAM)
+    if fields is None and exclude is None:
+        return None
+    wanted = [name for name in available if fields is None or name in fields]
+    return [name for name in wanted if not exclude or name not in exclude]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for ?fields=/?exclude=. field_dependencies maps fields
+    that are not a plain model column (method fields, nested serializers)
+    to the model paths they read.
+    """
+    field_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'), list(self.fields))
+        if wanted is not None:
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+    @classmethod
+    def narrow_queryset(cls, queryset, request):
+        """
+        Load only what the requested fields read. Ordering columns are kept
+        so keyset cursors can still be built from the rows.
+        """
+        fields = cls().fields
+        wanted = requested_fields(request, list(fields))
+        if wanted is None:
+            return queryset
+
+        paths, relations = set(), set()
+        for name in wanted:
+            field = fields[name]
+            if name in cls.field_dependencies:
+                paths.update(cls.field_dependencies[name])
+            elif isinstance(field, BaseSerializer):
+                # Nested serializers read the whole related row
+                source = field.source.replace('.', '__')
+                paths.add(source)
+                relations.add(source)
+            else:
+                paths.add(field.source.replace('.', '__'))
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        paths.update(
+            field.lstrip('-') for field in ordering
+            if isinstance(field, str) and field.lstrip('-') not in queryset.query.annotations
+        )
+        paths.discard('pk')
+        relations.update(path.rsplit('__', 1)[0] for path in paths if '__' in path)
+
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(queryset.model._meta.pk.name, *paths)
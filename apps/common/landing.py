@@ -0,0 +1,123 @@
+"""
+Landing-page bundle: the sections the landing and hub pages used to fetch
+one request at a time, assembled into a single response.
+
+Each section is cached on its own with its own TTL, so the bundle is
+usually served without touching the database. Hub and CDS writes drop the
+sections they feed once they commit; that only reaches the cache of the
+writing process, so with a per-process cache other workers rely on the TTL.
+Sections that have expired are rebuilt together. With LANDING_BUNDLE_WORKERS
+above 1 they are built in parallel threads, each on its own database
+connection; that only pays off when database round trips are slow, since
+every thread has to connect first.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.cds.catalog import get_catalog_snapshot
+from apps.cds.models import CDSCategory
+from apps.entrepreneurs_hub.models import Category, Product, Storefront
+from apps.entrepreneurs_hub.serializers import ProductSerializer, StorefrontSerializer
+
+CACHE_PREFIX = 'landing:'
+RECENT_PRODUCTS = 10
+CDS_ITEMS = 12
+
+
+def recent_products():
+    products = Product.objects.select_related('store_id').order_by('-created_at')[:RECENT_PRODUCTS]
+    return list(ProductSerializer(products, many=True).data)
+
+
+def product_categories():
+    return list(Category.objects.filter(product_count__gt=0).values_list('name', flat=True).order_by('name'))
+
+
+def store_names():
+    return list(Storefront.objects.values_list('name', flat=True).distinct())
+
+
+def storefronts():
+    return list(StorefrontSerializer(Storefront.objects.select_related('owner', 'stats'), many=True).data)
+
+
+def cds_items():
+    # Newest first, like the first page of get_cds_items
+    return [row.as_dict() for row in get_catalog_snapshot().by_id[:CDS_ITEMS]]
+
+
+def cds_categories():
+    return list(
+        CDSCategory.objects.filter(item_count__gt=0)
+        .order_by('name')
+        .values('name', 'item_count', 'available_count')
+    )
+
+
+# name -> (builder, TTL in seconds)
+SECTIONS = {
+    'recent_products': (recent_products, 60),
+    'categories': (product_categories, 300),
+    'store_names': (store_names, 300),
+    'storefronts': (storefronts, 120),
+    'cds_items': (cds_items, 30),
+    'cds_categories': (cds_categories, 300),
+}
+
+# Sections built from each app's tables, dropped when those tables change
+HUB_SECTIONS = ('recent_products', 'categories', 'store_names', 'storefronts')
+CDS_SECTIONS = ('cds_items', 'cds_categories')
+
+
+def invalidate_sections(names):
+    cache.delete_many([CACHE_PREFIX + name for name in names])
+
+
+def _build(name):
+    try:
+        return SECTIONS[name][0]()
+    finally:
+        connection.close()
+
+
+def build_sections(names):
+    """Build the named sections, concurrently if LANDING_BUNDLE_WORKERS allows"""
+    workers = min(settings.LANDING_BUNDLE_WORKERS, len(names))
+    if workers <= 1:
+        return {name: SECTIONS[name][0]() for name in names}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(names, pool.map(_build, names)))
+
+
+def get_bundle(names=None):
+    names = list(names or SECTIONS)
+    cached = cache.get_many([CACHE_PREFIX + name for name in names])
+    bundle = {name: cached[CACHE_PREFIX + name] for name in names if CACHE_PREFIX + name in cached}
+
+    missing = [name for name in names if name not in bundle]
+    if missing:
+        built = build_sections(missing)
+        for name, value in built.items():
+            cache.set(CACHE_PREFIX + name, value, SECTIONS[name][1])
+        bundle.update(built)
+    return bundle
+
+
+class LandingBundleAPIView(APIView):
+    permission_classes = [AllowAny]  # Allow anonymous access to the landing page
+
+    def get(self, request):
+        # ?sections=a,b limits the bundle to the sections a page needs
+        sections = request.query_params.get('sections')
+        names = [name.strip() for name in sections.split(',')] if sections else None
+        unknown = sorted(set(names or ()) - set(SECTIONS))
+        if unknown:
+            raise ValidationError({'sections': f"Unknown sections: {', '.join(unknown)}"})
+        return Response(get_bundle(names))
@@ -0,0 +1,314 @@
+"""
+Keyset (cursor) pagination shared by the CDS and Entrepreneurs Hub APIs.
+
+Offset paging reads and throws away every row before the requested page,
+so deep pages get slower linearly. A keyset page instead continues from the
+sort key of the last row already served:
+
+    WHERE (price, product_id) > (:last_price, :last_id) ORDER BY price, product_id
+
+Cursors are opaque url-safe tokens holding that sort key plus a unique
+tiebreaker (the primary key), so rows with equal sort values are never
+skipped or repeated. Counting the full result is optional. Orderings must
+be plain field names ('price', '-created_at'); expressions such as
+F('price').desc() cannot be turned into a cursor and are rejected.
+
+Function views use KeysetPaginator directly; DRF generic views use
+KeysetPagination, or CursorOrPageNumberPagination to keep page numbers for
+clients that do not send a cursor. Page-number counts go through the
+strategies in apps.common.counting.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .counting import DEFAULT_COUNT_CAP, EXACT, CountStrategyPaginator
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def with_tiebreaker(ordering, model):
+    """Append the primary key to an ordering unless it is already there"""
+    unsupported = [field for field in ordering if not isinstance(field, str) or field == '?']
+    if unsupported:
+        raise ImproperlyConfigured(
+            f'Keyset pagination needs field-name orderings, got {unsupported!r}'
+        )
+    ordering = list(ordering)
+    pk_name = model._meta.pk.name
+    if not any(field.lstrip('-') in (pk_name, 'pk') for field in ordering):
+        descending = ordering[-1].startswith('-') if ordering else False
+        ordering.append(f'-{pk_name}' if descending else pk_name)
+    return ordering
+
+
+def get_ordering(queryset):
+    """The ordering a queryset will actually use, including Meta.ordering"""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return with_tiebreaker(ordering, queryset.model)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _resolve_field(model, path):
+    field = None
+    for part in path.split('__'):
+        field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _row_value(row, path):
+    value = row
+    for part in path.split('__'):
+        value = getattr(value, part)
+    if hasattr(value, '_meta'):
+        value = value.pk
+    return value
+
+
+def encode_cursor(ordering, row):
+    payload = {
+        'o': ','.join(ordering),
+        'v': [_encode_value(_row_value(row, field.lstrip('-'))) for field in ordering],
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ordering, model):
+    """Return the sort-key values stored in a cursor, typed for the model fields"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload['o'] != ','.join(ordering) or len(payload['v']) != len(ordering):
+            raise InvalidCursor(cursor)
+        return [
+            _resolve_field(model, field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, payload['v'])
+        ]
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor(cursor)
+
+
+def keyset_filter(ordering, values, model=None):
+    """
+    Build the "comes after" predicate for a row-value comparison that may mix
+    ascending and descending fields:
+    (a > x) OR (a = x AND b < y) OR (a = x AND b = y AND pk > z) ...
+
+    NULLs sort as PostgreSQL sorts them, after every value ascending and
+    before every value descending. Given the model, nullable fields get the
+    extra IS NULL branches; without it the fields are treated as non-null
+    unless the cursor itself holds a NULL.
+    """
+    condition = Q()
+    equal_so_far = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        nullable = model is not None and _resolve_field(model, name).null
+        if value is None:
+            # Only non-null values come after a NULL, and only descending
+            after = Q(**{f'{name}__isnull': False}) if descending else None
+        else:
+            after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            if nullable and not descending:
+                after |= Q(**{f'{name}__isnull': True})
+        if after is not None:
+            condition |= Q(**equal_so_far) & after
+        # name=None filters on IS NULL
+        equal_so_far[name] = value
+    return condition
+
+
+class KeysetPage:
+    __slots__ = ('rows', 'next_cursor', 'count')
+
+    def __init__(self, rows, next_cursor, count=None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate an ordered queryset by keyset.
+
+        page = KeysetPaginator(orders, page_size=20).page(request.GET.get('cursor'))
+
+    The queryset's ordering (or the model's Meta.ordering) is used, with the
+    primary key appended as tiebreaker. count=True adds a COUNT(*) of the
+    whole result, unless the caller already knows it (known_count); leave
+    it off where clients do not need totals.
+    """
+
+    def __init__(self, queryset, page_size=20, ordering=None, count=False, known_count=None):
+        ordering = with_tiebreaker(ordering, queryset.model) if ordering else get_ordering(queryset)
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.page_size = page_size
+        self.count = count
+        self.known_count = known_count
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        if cursor:
+            values = decode_cursor(cursor, self.ordering, queryset.model)
+            queryset = queryset.filter(keyset_filter(self.ordering, values, queryset.model))
+
+        # One extra row tells us whether another page exists
+        rows = list(queryset[:self.page_size + 1])
+        next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            next_cursor = encode_cursor(self.ordering, rows[-1])
+
+        count = None
+        if self.count:
+            count = self.known_count if self.known_count is not None else self.queryset.count()
+        return KeysetPage(rows, next_cursor, count)
+
+
+def get_page_size(request, default=20, maximum=100, param='page_size'):
+    params = getattr(request, 'query_params', request.GET)
+    try:
+        page_size = int(params.get(param, default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, maximum))
+
+
+def wants_count(request, param='count'):
+    params = getattr(request, 'query_params', request.GET)
+    return params.get(param, '').lower() in ['1', 'true', 'yes']
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination class built on KeysetPaginator. The view's queryset
+    ordering decides the sort key; ?count=1 adds the total. A view that has
+    already counted the rows can set known_count before paginating.
+    """
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    known_count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(
+            queryset,
+            page_size=get_page_size(request, self.page_size, self.max_page_size, self.page_size_query_param),
+            count=wants_count(request, self.count_query_param),
+            known_count=self.known_count,
+        )
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise ParseError('Invalid cursor.')
+        return list(self.page)
+
+    def get_next_link(self):
+        if not self.page.has_more:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.page.next_cursor)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'next_cursor': self.page.next_cursor,
+            'results': data,
+        }
+        if self.page.count is not None:
+            response['count'] = self.page.count
+        return Response(response)
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination whose count comes from a count strategy (see
+    apps.common.counting); inexact counts add count_exact/count_display.
+    Suits result orders that cannot be keyset-paginated, e.g. search rank.
+    A view that has already counted the rows can set known_count before
+    paginating to skip the count.
+    """
+    count_strategy = EXACT
+    count_cap = DEFAULT_COUNT_CAP
+    known_count = None
+
+    @property
+    def django_paginator_class(self):
+        return partial(
+            CountStrategyPaginator,
+            count_strategy=self.count_strategy,
+            count_cap=self.count_cap,
+            known_count=self.known_count
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        count = self.page.paginator.count_result
+        if not count.exact:
+            response.data['count_exact'] = False
+            response.data['count_display'] = count.display
+        return response
+
+
+class CursorOrPageNumberPagination(CountedPageNumberPagination):
+    """
+    Page-number pagination that switches to keyset pagination when the
+    client sends ?cursor= (empty for the first page), so existing page-based
+    clients keep working while new ones avoid OFFSET scans.
+    """
+    keyset_class = KeysetPagination
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.keyset.page_size = self.page_size
+            self.keyset.max_page_size = self.max_page_size or self.keyset.max_page_size
+            self.keyset.known_count = self.known_count
+            if self.page_size_query_param:
+                self.keyset.page_size_query_param = self.page_size_query_param
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,257 @@
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import EmptyPage
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.cds.models import CDS_Item, CDSOrder
+from apps.entrepreneurs_hub.models import Owner, Product, Storefront
+from . import landing
+from .counting import AUTO, CAPPED, EXACT, CountResult, CountStrategyPaginator, capped_count, count_queryset
+from .pagination import (
+    InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor, keyset_filter, with_tiebreaker
+)
+
+
+class CursorTests(TestCase):
+
+    def test_round_trip_keeps_field_types(self):
+        ordering = ['-created_at', 'total_amount', '-id']
+        order = CDSOrder(
+            id=7,
+            created_at=datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc),
+            total_amount=Decimal('120.50')
+        )
+        values = decode_cursor(encode_cursor(ordering, order), ordering, CDSOrder)
+        self.assertEqual(values, [order.created_at, Decimal('120.50'), 7])
+
+    def test_round_trip_keeps_nulls(self):
+        ordering = ['stock_quantity', 'item_id']
+        item = CDS_Item(item_id=3, stock_quantity=None)
+        self.assertEqual(decode_cursor(encode_cursor(ordering, item), ordering, CDS_Item), [None, 3])
+
+    def test_cursor_for_another_ordering_is_rejected(self):
+        cursor = encode_cursor(['price', 'item_id'], CDS_Item(item_id=1, price=Decimal('5.00')))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(cursor, ['-price', '-item_id'], CDS_Item)
+
+    def test_garbage_is_rejected(self):
+        for cursor in ['not-a-cursor', 'e30', '!!!']:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                decode_cursor(cursor, ['price', 'item_id'], CDS_Item)
+
+    def test_expression_orderings_are_rejected(self):
+        for ordering in ([F('price').desc()], ['name', F('price').asc()], ['?']):
+            with self.subTest(ordering=ordering), self.assertRaises(ImproperlyConfigured):
+                with_tiebreaker(ordering, CDS_Item)
+
+
+class KeysetFilterTests(TestCase):
+    """Walking every page must give exactly the rows of the full ordered query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Repeated prices and stock levels, some items untracked (NULL stock)
+        CDS_Item.objects.bulk_create([
+            CDS_Item(
+                name=f'Item {index}',
+                description='Seeded for keyset tests',
+                price=Decimal(10 + index % 3),
+                stock_quantity=None if index % 4 == 0 else index % 5,
+            )
+            for index in range(23)
+        ])
+
+    def walk(self, ordering, page_size=4):
+        paginator = KeysetPaginator(CDS_Item.objects.all(), page_size=page_size, ordering=ordering)
+        rows, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            rows.extend(item.pk for item in page)
+            if not page.has_more:
+                return rows
+            cursor = page.next_cursor
+
+    def test_pages_match_full_ordering(self):
+        orderings = [
+            ['price'],
+            ['-price'],
+            ['price', '-name'],
+            ['-price', 'name'],
+            ['stock_quantity'],
+            ['-stock_quantity'],
+            ['stock_quantity', '-price'],
+            ['-stock_quantity', 'price'],
+        ]
+        for ordering in orderings:
+            with self.subTest(ordering=ordering):
+                full = with_tiebreaker(ordering, CDS_Item)
+                expected = list(CDS_Item.objects.order_by(*full).values_list('pk', flat=True))
+                self.assertEqual(self.walk(ordering), expected)
+
+    def test_null_cursor_value(self):
+        # Ascending, NULLs come last, so only later NULLs follow a NULL
+        after = CDS_Item.objects.filter(keyset_filter(['stock_quantity', 'item_id'], [None, 0], CDS_Item))
+        self.assertTrue(after.exists())
+        self.assertFalse(after.filter(stock_quantity__isnull=False).exists())
+
+
+class InvalidCursorResponseTests(TestCase):
+
+    def test_product_list(self):
+        response = APIClient().get('/api/entrepreneurs_hub/products/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_order_history(self):
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        )
+        response = client.get('/api/cds/user_orders/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CountStrategyTests(TestCase):
+    ITEMS = 23
+
+    @classmethod
+    def setUpTestData(cls):
+        CDS_Item.objects.bulk_create([
+            CDS_Item(name=f'Item {index}', description='Seeded for count tests', price=Decimal(10), category='Food')
+            for index in range(cls.ITEMS)
+        ])
+
+    def test_capped_count_over_cap(self):
+        count = capped_count(CDS_Item.objects.all(), cap=10)
+        self.assertEqual((count.value, count.exact, count.capped, count.display), (10, False, True, '10+'))
+
+    def test_capped_count_under_cap_is_exact(self):
+        count = capped_count(CDS_Item.objects.all(), cap=100)
+        self.assertEqual((count.value, count.exact, count.display), (self.ITEMS, True, str(self.ITEMS)))
+
+    def test_capped_count_of_a_list(self):
+        self.assertTrue(capped_count(list(range(11)), cap=10).capped)
+
+    def test_auto_estimates_only_without_where_clause(self):
+        with mock.patch('apps.common.counting.estimated_count', return_value=CountResult(1)) as estimated, \
+                mock.patch('apps.common.counting.capped_count', return_value=CountResult(1)) as capped:
+            count_queryset(CDS_Item.objects.all(), AUTO)
+            self.assertEqual((estimated.call_count, capped.call_count), (1, 0))
+            count_queryset(CDS_Item.objects.filter(category='Food'), AUTO)
+            self.assertEqual((estimated.call_count, capped.call_count), (1, 1))
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            count_queryset(CDS_Item.objects.all(), 'guess')
+
+    def test_pages_past_an_inexact_total(self):
+        paginator = CountStrategyPaginator(
+            CDS_Item.objects.order_by('item_id'), per_page=5, count_strategy=CAPPED, count_cap=10
+        )
+        self.assertEqual((paginator.count, paginator.num_pages), (10, 2))
+        self.assertEqual(paginator.validate_number(4), 4)
+
+        page = paginator.page(3)
+        self.assertEqual(len(page), 5)
+        self.assertTrue(page.has_next())
+        last = paginator.page(5)
+        self.assertEqual(len(last), 3)
+        self.assertFalse(last.has_next())
+
+        with self.assertRaises(EmptyPage):
+            paginator.validate_number(0)
+
+    def test_exact_paginator_stops_at_total(self):
+        paginator = CountStrategyPaginator(CDS_Item.objects.order_by('item_id'), per_page=5, count_strategy=EXACT)
+        self.assertEqual(paginator.num_pages, 5)
+        self.assertFalse(paginator.page(5).has_next())
+        with self.assertRaises(EmptyPage):
+            paginator.validate_number(6)
+
+
+class LandingBundleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Owner.objects.create(name='Owner', email='owner@iut-dhaka.edu', phone='01700000000')
+        cls.store = Storefront.objects.create(owner=owner, name='Campus Crafts', description='Handmade')
+        Product.objects.create(store_id=cls.store, name='Notebook', description='A5', price=Decimal('80.00'), category='Stationery')
+        CDS_Item.objects.create(name='Samosa', description='Snack', price=Decimal('10.00'), category='Food')
+
+    def setUp(self):
+        cache.clear()
+        # Start the CDS section from an empty catalog snapshot as well
+        patcher = mock.patch('apps.cds.catalog._snapshot', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cold_then_warm(self):
+        # One query per section; the CDS items read the catalog version, then its rows
+        with self.assertNumQueries(len(landing.SECTIONS) + 1):
+            cold = APIClient().get('/api/landing/')
+        with self.assertNumQueries(0):
+            warm = APIClient().get('/api/landing/')
+        self.assertEqual(cold.status_code, 200)
+        self.assertEqual(warm.json(), cold.json())
+        self.assertEqual(set(cold.json()), set(landing.SECTIONS))
+        self.assertEqual(cold.json()['categories'], ['Stationery'])
+
+    def test_sections_limit_the_bundle(self):
+        response = APIClient().get('/api/landing/', {'sections': 'store_names, cds_categories'})
+        self.assertEqual(set(response.json()), {'store_names', 'cds_categories'})
+
+    def test_unknown_section_is_rejected(self):
+        response = APIClient().get('/api/landing/', {'sections': 'store_names,everything'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('everything', str(response.json()['sections']))
+
+    def test_sections_expire_on_their_own_ttl(self):
+        now = 1_000_000.0
+        with mock.patch('django.core.cache.backends.locmem.time.time', side_effect=lambda: now):
+            landing.get_bundle()
+            now += landing.SECTIONS['cds_items'][1] + 1
+            # Only the CDS items are rebuilt, from the still current snapshot
+            with self.assertNumQueries(1):
+                landing.get_bundle(['cds_items', 'store_names'])
+            now += landing.SECTIONS['store_names'][1]
+            with self.assertNumQueries(1):
+                landing.get_bundle(['store_names'])
+
+    def test_writes_drop_their_sections(self):
+        landing.get_bundle()
+        with self.captureOnCommitCallbacks(execute=True):
+            Storefront.objects.create(owner=self.store.owner, name='Late Night Bites', description='Snacks')
+        self.assertIn('Late Night Bites', landing.get_bundle(['store_names'])['store_names'])
+        # The CDS sections stay cached until a CDS item changes
+        with self.assertNumQueries(0):
+            landing.get_bundle(landing.CDS_SECTIONS)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CDS_Item.objects.create(name='Tea', description='Hot', price=Decimal('5.00'), category='Drinks')
+        names = [row['name'] for row in landing.get_bundle(['cds_categories'])['cds_categories']]
+        self.assertEqual(names, ['Drinks', 'Food'])
+
+    @override_settings(LANDING_BUNDLE_WORKERS=3)
+    def test_sections_build_in_threads_that_close_their_connection(self):
+        threads = {}
+
+        def builder(name):
+            def build():
+                threads[name] = threading.get_ident()
+                return name
+            return build
+
+        sections = {name: (builder(name), 60) for name in ('a', 'b', 'c')}
+        with mock.patch.dict(landing.SECTIONS, sections, clear=True), \
+                mock.patch.object(landing, 'connection') as connection:
+            self.assertEqual(landing.build_sections(['a', 'b', 'c']), {'a': 'a', 'b': 'b', 'c': 'c'})
+
+        self.assertNotIn(threading.get_ident(), threads.values())
+        self.assertEqual(connection.close.call_count, 3)
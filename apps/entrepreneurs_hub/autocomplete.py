@@ -0,0 +1,154 @@
+"""
+Process-local prefix index behind AutocompleteView.
+
+Distinct product and storefront names are kept in a sorted array of
+normalized keys, one per word start, so "can" finds both "Candle Set" (a
+prefix match) and "Scented Candle" (an in-name match) with a binary search.
+Matches are ranked by popularity. Answers are cached per prefix until the
+index changes.
+
+The index is a LocalCache: built lazily on first use, patched in place
+from model signals once a write commits, and rebuilt when another worker
+has bumped the shared PRODUCT_NAMES generation. That check runs at most
+every REFRESH_INTERVAL seconds, so keystrokes normally never reach the
+database.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from .generations import PRODUCT_NAMES, LocalCache
+from .models import Product, Storefront
+
+PRODUCT = 'product'
+STOREFRONT = 'storefront'
+
+REFRESH_INTERVAL = 5.0
+RESULT_CACHE_SIZE = 2048
+MAX_SUGGESTIONS = 10
+
+
+def normalize(text):
+    return ' '.join((text or '').casefold().split())
+
+
+class PrefixIndex:
+    """Sorted (key, kind, name, is_full_name) entries plus popularity weights"""
+
+    def __init__(self):
+        self.entries = []
+        self.members = {}   # (kind, id) -> (name, weight)
+        self.weights = {}   # (kind, name) -> {id: weight}
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, kind, member_id, name, weight=0.0):
+        with self.lock:
+            self._remove(kind, member_id)
+            if not normalize(name):
+                return
+            self.members[(kind, member_id)] = (name, weight)
+            ids = self.weights.setdefault((kind, name), {})
+            if not ids:
+                for key, full in self._keys(name):
+                    insort(self.entries, (key, kind, name, full))
+            ids[member_id] = weight
+            self.results.clear()
+
+    def add_many(self, kind, members):
+        """
+        Bulk add of (id, name, weight) rows, one per id: new entries are
+        appended and sorted once rather than inserted one at a time.
+        """
+        with self.lock:
+            for member_id, name, weight in members:
+                self._remove(kind, member_id)
+                if not normalize(name):
+                    continue
+                self.members[(kind, member_id)] = (name, weight)
+                ids = self.weights.setdefault((kind, name), {})
+                if not ids:
+                    self.entries.extend((key, kind, name, full) for key, full in self._keys(name))
+                ids[member_id] = weight
+            self.entries.sort()
+            self.results.clear()
+
+    def remove(self, kind, member_id):
+        with self.lock:
+            self._remove(kind, member_id)
+            self.results.clear()
+
+    def _remove(self, kind, member_id):
+        member = self.members.pop((kind, member_id), None)
+        if member is None:
+            return
+        name = member[0]
+        ids = self.weights.get((kind, name), {})
+        ids.pop(member_id, None)
+        if not ids:
+            self.weights.pop((kind, name), None)
+            for key, full in self._keys(name):
+                entry = (key, kind, name, full)
+                position = bisect_left(self.entries, entry)
+                if position < len(self.entries) and self.entries[position] == entry:
+                    del self.entries[position]
+
+    @staticmethod
+    def _keys(name):
+        """One key per word start: the full name, then each later suffix"""
+        words = normalize(name).split(' ')
+        return [(' '.join(words[position:]), position == 0) for position in range(len(words))]
+
+    def weight(self, kind, name):
+        return max(self.weights.get((kind, name), {}).values(), default=0.0)
+
+    def suggest(self, query):
+        query = normalize(query)
+        with self.lock:
+            cached = self.results.get(query)
+            if cached is not None:
+                self.results.move_to_end(query)
+                return cached
+
+            starts = {PRODUCT: set(), STOREFRONT: set()}
+            inside = set()
+            position = bisect_left(self.entries, (query,))
+            while position < len(self.entries) and self.entries[position][0].startswith(query):
+                key, kind, name, full = self.entries[position]
+                if full:
+                    starts[kind].add(name)
+                elif kind == PRODUCT:
+                    inside.add(name)
+                position += 1
+
+            def best(kind, names, limit):
+                return sorted(names, key=lambda name: (-self.weight(kind, name), name))[:limit]
+
+            # Same mix as the original queries: 5 product and 5 storefront
+            # prefix matches, topped up with 3 in-name product matches
+            suggestions = best(PRODUCT, starts[PRODUCT], 5) + best(STOREFRONT, starts[STOREFRONT], 5)
+            if len(suggestions) < 8:
+                suggestions += best(PRODUCT, inside - starts[PRODUCT], 3)
+            suggestions = suggestions[:MAX_SUGGESTIONS]
+
+            self.results[query] = suggestions
+            if len(self.results) > RESULT_CACHE_SIZE:
+                self.results.popitem(last=False)
+            return suggestions
+
+
+def build_index():
+    index = PrefixIndex()
+    index.add_many(PRODUCT, Product.objects.order_by().values_list('product_id', 'name', 'popularity_score'))
+    index.add_many(STOREFRONT, (
+        (store_id, name, weight or 0)
+        for store_id, name, weight in Storefront.objects.order_by().values_list('store_id', 'name', 'stats__product_count')
+    ))
+    return index
+
+
+index_cache = LocalCache(PRODUCT_NAMES, build_index, REFRESH_INTERVAL)
+
+
+def suggest(query):
+    return index_cache.get().suggest(query)
@@ -0,0 +1,65 @@
+"""
+Normalized product categories.
+
+Product.category stays free text on input but is resolved to a Category row
+on save: case and whitespace variants map to the same key, and the product
+takes that row's canonical name. Product counts per category are adjusted
+by deltas as products are written, so the category list and the category
+filter are indexed lookups on the small Category table.
+"""
+from django.db.models import Count, F, Q
+
+from .models import Category
+
+_COUNT_FIELDS = ('product_count', 'available_product_count')
+
+
+def normalize_category_name(name):
+    return ' '.join((name or '').split())
+
+
+def category_key(name):
+    return normalize_category_name(name).lower()
+
+
+def resolve_category(name):
+    """The Category row for name, created on first use; None for a blank name"""
+    name = normalize_category_name(name)
+    if not name:
+        return None
+    category, _ = Category.objects.get_or_create(key=name.lower(), defaults={'name': name})
+    return category
+
+
+def adjust_category_counts(category_id, products=0, available=0):
+    """Add the given deltas to a category's product and available-product counts"""
+    if category_id is None or not (products or available):
+        return
+    Category.objects.filter(pk=category_id).update(
+        product_count=F('product_count') + products,
+        available_product_count=F('available_product_count') + available
+    )
+
+
+def rebuild_category_counts():
+    """Recompute every category's counts from its products; returns the number of categories"""
+    rows = Category.objects.order_by().annotate(
+        n_products=Count('products'),
+        n_available=Count('products', filter=Q(products__availability=True)),
+    ).values_list('pk', 'n_products', 'n_available')
+
+    categories = [
+        Category(pk=pk, product_count=n_products, available_product_count=n_available)
+        for pk, n_products, n_available in rows
+    ]
+    Category.objects.bulk_update(categories, _COUNT_FIELDS, batch_size=500)
+    return len(categories)
+
+
+def category_filter(name):
+    """Q matching products in the category called name, in any casing"""
+    return Q(normalized_category__key=category_key(name))
+
+
+def filter_by_category(queryset, name):
+    return queryset.filter(category_filter(name))
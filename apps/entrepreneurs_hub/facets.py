@@ -0,0 +1,121 @@
+"""
+Facet counts for a filtered product queryset.
+
+Category, store, availability and price-bucket counts come from a single
+GROUP BY GROUPING SETS query over the filtered rows, so the sidebar always
+agrees with the results it sits next to. GROUPING() tells the rows of each
+set apart; the empty set carries the grand total.
+
+The category and store counts leave out their own filter (but keep every
+other one), so a sidebar with a category picked still lists the other
+categories it could switch to. The rows are passed in without those two
+filters, which are applied through COUNT(*) FILTER instead.
+"""
+from django.db import connection
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, IntegerField, Value, When
+
+# Lower edges of the price buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0, 100, 250, 500, 1000, 2500)
+
+# GROUPING(category, store, available, price) of each grouping set: a bit is
+# set for every column aggregated away
+CATEGORY_SET = 0b0111
+STORE_SET = 0b1011
+AVAILABILITY_SET = 0b1101
+PRICE_SET = 0b1110
+TOTAL_SET = 0b1111
+
+FACETS_SQL = """
+SELECT
+    GROUPING(facet_category, facet_store, facet_available, facet_price),
+    facet_category, facet_store, facet_store_name, facet_available, facet_price,
+    COUNT(*) FILTER (WHERE facet_in_category AND facet_in_store),
+    COUNT(*) FILTER (WHERE facet_in_store),
+    COUNT(*) FILTER (WHERE facet_in_category)
+FROM ({rows}) AS filtered
+GROUP BY GROUPING SETS (
+    (facet_category),
+    (facet_store, facet_store_name),
+    (facet_available),
+    (facet_price),
+    ()
+)
+"""
+
+
+def price_bucket_expression():
+    """Index into PRICE_BUCKETS of the bucket holding the product's price"""
+    upper_edges = PRICE_BUCKETS[1:]
+    return Case(
+        *[When(price__lt=edge, then=Value(index)) for index, edge in enumerate(upper_edges)],
+        default=Value(len(upper_edges)),
+        output_field=IntegerField()
+    )
+
+
+def price_bucket_bounds(index):
+    upper = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+    return PRICE_BUCKETS[index], upper
+
+
+def _matches(condition):
+    if condition is None:
+        return Value(True)
+    return ExpressionWrapper(condition, output_field=BooleanField())
+
+
+def facet_counts(queryset, category_filter=None, store_filter=None):
+    """
+    Grouped counts for the products matched by queryset. category_filter and
+    store_filter are the Q objects of the current category and store
+    filters, which queryset must not apply itself.
+    """
+    rows = queryset.order_by().annotate(
+        facet_category=F('category'),
+        facet_store=F('store_id'),
+        facet_store_name=F('store_id__name'),
+        facet_available=F('availability'),
+        facet_price=price_bucket_expression(),
+        facet_in_category=_matches(category_filter),
+        facet_in_store=_matches(store_filter),
+    ).values(
+        'facet_category', 'facet_store', 'facet_store_name', 'facet_available', 'facet_price',
+        'facet_in_category', 'facet_in_store'
+    )
+    sql, params = rows.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL.format(rows=sql), params)
+        grouped = cursor.fetchall()
+
+    total = 0
+    categories, stores, prices = [], [], {}
+    availability = {'in_stock': 0, 'out_of_stock': 0}
+    for grouping, category, store_id, store_name, available, bucket, count, in_store, in_category in grouped:
+        if grouping == CATEGORY_SET:
+            if in_store:
+                categories.append({'value': category, 'count': in_store})
+        elif grouping == STORE_SET:
+            if in_category:
+                stores.append({'id': store_id, 'name': store_name, 'count': in_category})
+        elif grouping == AVAILABILITY_SET:
+            availability['in_stock' if available else 'out_of_stock'] = count
+        elif grouping == PRICE_SET:
+            prices[bucket] = count
+        elif grouping == TOTAL_SET:
+            total = count
+
+    categories.sort(key=lambda facet: (-facet['count'], facet['value']))
+    stores.sort(key=lambda facet: (-facet['count'], facet['name']))
+    price = []
+    for index in range(len(PRICE_BUCKETS)):
+        low, high = price_bucket_bounds(index)
+        price.append({'min': low, 'max': high, 'count': prices.get(index, 0)})
+
+    return {
+        'total': total,
+        'categories': categories,
+        'stores': stores,
+        'availability': availability,
+        'price': price,
+    }
@@ -0,0 +1,91 @@
+"""
+Generation counters for process-local caches of hub data.
+
+Each worker remembers the generation its cache was built at and throws the
+cache away once the shared counter has moved on.
+"""
+import threading
+import time
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CacheGeneration
+
+PRODUCT_NAMES = 'product_names'
+SEARCH_RESULTS = 'search_results'
+
+
+def get_generation(key):
+    generation = CacheGeneration.objects.filter(pk=key).values_list('generation', flat=True).first()
+    return generation or 0
+
+
+def bump_generation(key):
+    """Mark every worker's cache for key as stale; returns the new generation"""
+    updated = CacheGeneration.objects.filter(pk=key).update(
+        generation=F('generation') + 1,
+        updated_at=timezone.now()
+    )
+    if not updated:
+        CacheGeneration.objects.get_or_create(pk=key, defaults={'generation': 1})
+    return get_generation(key)
+
+
+class LocalCache:
+    """
+    A process-local value built from the database and rebuilt once the
+    shared generation for its key moves. The generation is checked at most
+    every refresh_interval seconds, so most reads never query.
+    """
+
+    def __init__(self, key, build, refresh_interval=5.0):
+        self.key = key
+        self.build = build
+        self.refresh_interval = refresh_interval
+        self.value = None
+        self.generation = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if self.value is not None and now - self.checked_at < self.refresh_interval:
+            return self.value
+
+        with self.lock:
+            generation = get_generation(self.key)
+            if self.value is None or generation != self.generation:
+                self.value = self.build()
+                self.generation = generation
+            self.checked_at = now
+            return self.value
+
+    def expire(self):
+        """Force a generation check on the next read"""
+        self.checked_at = 0.0
+
+    def patch(self, mutate, previous, generation):
+        """
+        Apply a local change made alongside a bump from previous to
+        generation. The new generation is only adopted if no other worker
+        bumped in between; otherwise the next check rebuilds from the database.
+        """
+        value = self.value
+        if value is None:
+            return
+        mutate(value)
+        with self.lock:
+            if self.value is value and self.generation == previous and generation == previous + 1:
+                self.generation = generation
+
+
+def record_change(key, *patches):
+    """
+    Bump key's generation once and patch this worker's caches with
+    (cache, mutate) pairs. Call after the write has committed.
+    """
+    previous = get_generation(key)
+    generation = bump_generation(key)
+    for cache, mutate in patches:
+        cache.patch(mutate, previous, generation)
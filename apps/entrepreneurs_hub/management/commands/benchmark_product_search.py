@@ -0,0 +1,99 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, IntegerField, Q, When
+from django.db.models.functions import Ln
+from apps.common.benchmarking import ROLLBACK_NOTICE, analyze, filler_name, measure, rolled_back, sample_name
+from apps.entrepreneurs_hub.models import Product, Storefront
+from apps.entrepreneurs_hub.search import ranked_products, search_vector_expression
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ranked full-text product search against the legacy icontains search'
+
+    ADJECTIVES = ['Handmade', 'Vintage', 'Organic', 'Printed', 'Knitted', 'Painted', 'Leather', 'Wooden', 'Scented', 'Mini']
+    NOUNS = ['Notebook', 'Candle', 'Tote', 'Bracelet', 'Poster', 'Mug', 'Cookies', 'Keychain', 'Scarf', 'Planter']
+    CATEGORIES = ['Crafts', 'Food', 'Clothing', 'Accessories', 'Stationery', 'Art']
+    MATCHING_ROWS = 500
+    PAGE_SIZE = 12
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=100000,
+            help='Catalog size to benchmark at'
+        )
+        parser.add_argument(
+            '--queries',
+            default='candle,handmade mug,"leather tote",notebook -vintage',
+            help='Comma-separated websearch queries'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per query'
+        )
+
+    def handle(self, *args, **options):
+        queries = [query.strip() for query in options['queries'].split(',') if query.strip()]
+        repeat = options['repeat']
+
+        self.stdout.write(ROLLBACK_NOTICE)
+        with rolled_back():
+            self.seed(options['products'])
+            ranked = measure(
+                lambda query: list(ranked_products(query)[:self.PAGE_SIZE].values_list('product_id', flat=True)),
+                queries, repeat
+            )
+            # Plain words only: the old endpoint matched the raw string
+            legacy = measure(
+                lambda query: list(self.legacy_search(query.strip('"').split(' -')[0])[:50].values_list('product_id', flat=True)),
+                queries, repeat
+            )
+
+        self.stdout.write(f"{'search':>10} {'p50':>10} {'p95':>10}")
+        self.stdout.write(f"{'ranked':>10} {ranked[0]:>8.2f}ms {ranked[1]:>8.2f}ms")
+        self.stdout.write(f"{'icontains':>10} {legacy[0]:>8.2f}ms {legacy[1]:>8.2f}ms")
+        if ranked[1]:
+            self.stdout.write(f'p95 speedup: {legacy[1] / ranked[1]:.1f}x')
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
+
+    def legacy_search(self, query):
+        """The icontains search AdvancedSearchView ran before ranked search"""
+        return Product.objects.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__icontains=query) |
+            Q(store_id__name__icontains=query)
+        ).annotate(
+            name_match=Case(When(name__icontains=query, then=4), default=0, output_field=IntegerField()),
+            store_match=Case(When(store_id__name__icontains=query, then=3), default=0, output_field=IntegerField()),
+            category_match=Case(When(category__icontains=query, then=2), default=0, output_field=IntegerField()),
+            desc_match=Case(When(description__icontains=query, then=1), default=0, output_field=IntegerField()),
+            total_score=F('name_match') + F('store_match') + F('category_match') + F('desc_match') + F('views') * 0.001
+        ).order_by('-total_score', '-created_at')
+
+    def seed(self, size):
+        """Fill the catalog up to size rows"""
+        store = Storefront.objects.create(name='Benchmark Store')
+        missing = max(size - Product.objects.count(), 0)
+        products = [
+            Product(
+                store_id=store,
+                name=sample_name(index, self.MATCHING_ROWS, self.ADJECTIVES, self.NOUNS),
+                description=filler_name(),
+                price=round(random.uniform(20, 2000), 2),
+                availability=random.random() < 0.8,
+                category=random.choice(self.CATEGORIES),
+                views=random.randint(0, 500),
+            )
+            for index in range(missing)
+        ]
+        Product.objects.bulk_create(products, batch_size=5000)
+        Product.objects.filter(search_vector__isnull=True).update(
+            search_vector=search_vector_expression(),
+            popularity_score=Ln(F('views') + 1)
+        )
+        analyze(Product)
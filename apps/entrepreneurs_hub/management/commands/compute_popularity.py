@@ -0,0 +1,121 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models.functions import Extract
+from django.utils import timezone
+from apps.entrepreneurs_hub.models import Product
+from apps.entrepreneurs_hub.search_cache import invalidate_search_results
+
+# Weight of the rating signal against ln(1 + views)
+RATING_WEIGHT = 2.0
+# Ratings a product needs before its own average outweighs the catalog's
+RATING_PRIOR = 5
+# Share of the score an old product keeps once recency has fully decayed
+RECENCY_FLOOR = 0.2
+# Multiplier for products that cannot currently be bought
+UNAVAILABLE_FACTOR = 0.3
+# Scores closer than this to the stored value are not rewritten
+TOLERANCE = 1e-6
+
+UPDATE_SQL = """
+UPDATE {table} AS product SET popularity_score = batch.score
+FROM (SELECT UNNEST(%s::integer[]) AS id, UNNEST(%s::double precision[]) AS score) AS batch
+WHERE product.{pk} = batch.id
+"""
+
+
+def popularity_scores(np, views, rating_sum, rating_count, age_days, available, half_life_days):
+    """
+    Time-decayed popularity for whole columns at once: engagement from views
+    and a Bayesian-averaged rating, scaled by an exponential recency decay
+    and an availability penalty.
+    """
+    total_count = rating_count.sum()
+    prior_mean = rating_sum.sum() / total_count if total_count else 3.0
+    bayesian_rating = (rating_sum + prior_mean * RATING_PRIOR) / (rating_count + RATING_PRIOR)
+
+    engagement = np.log1p(views) + RATING_WEIGHT * (bayesian_rating / 5.0) * np.log1p(rating_count)
+    decay = np.exp2(-np.maximum(age_days, 0.0) / half_life_days)
+    recency = RECENCY_FLOOR + (1.0 - RECENCY_FLOOR) * decay
+    return engagement * recency * np.where(available, 1.0, UNAVAILABLE_FACTOR)
+
+
+class Command(BaseCommand):
+    help = 'Recompute the time-decayed popularity score of every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Products written by each UPDATE'
+        )
+        parser.add_argument(
+            '--half-life-days',
+            type=float,
+            default=30.0,
+            help='Age at which the recency part of the score has halved'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compute scores and report how many changed without writing them'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('compute_popularity needs NumPy: pip install numpy')
+
+        if options['half_life_days'] <= 0:
+            raise CommandError('--half-life-days must be positive.')
+        batch_size = max(1, options['batch_size'])
+
+        started = time.perf_counter()
+        rows = list(
+            Product.objects.annotate(created=Extract('created_at', 'epoch')).values_list(
+                'product_id', 'views', 'rating_sum', 'rating_count', 'availability', 'created', 'popularity_score'
+            ).order_by()
+        )
+        if not rows:
+            self.stdout.write(self.style.SUCCESS('No products to score'))
+            return
+
+        ids, views, rating_sum, rating_count, available, created, current = (
+            np.array(column) for column in zip(*rows)
+        )
+        age_days = (timezone.now().timestamp() - created.astype(float)) / 86400.0
+        scores = popularity_scores(
+            np, views.astype(float), rating_sum.astype(float), rating_count.astype(float),
+            age_days, available.astype(bool), options['half_life_days']
+        )
+
+        changed = np.abs(scores - current.astype(float)) > TOLERANCE
+        ids, scores = ids[changed], scores[changed]
+        self.stdout.write(
+            f'Scored {len(rows)} products in {time.perf_counter() - started:.2f}s; {len(ids)} changed'
+        )
+        if options['dry_run']:
+            return
+
+        sql = UPDATE_SQL.format(
+            table=connection.ops.quote_name(Product._meta.db_table),
+            pk=connection.ops.quote_name(Product._meta.pk.column)
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(ids), batch_size):
+                with transaction.atomic():
+                    cursor.execute(sql, [
+                        ids[start:start + batch_size].tolist(),
+                        scores[start:start + batch_size].tolist(),
+                    ])
+
+        # Cached search results may rank or match differently now
+        invalidate_search_results()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Updated popularity for {len(ids)} products ({time.perf_counter() - started:.1f}s)'
+            )
+        )
@@ -1,21 +1,135 @@
-from django.core.management.base import BaseCommand
-from django.contrib.postgres.search import SearchVector
+import json
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Max, Min
 from apps.entrepreneurs_hub.models import Product
+from apps.entrepreneurs_hub.search import drop_search_trigger, install_search_trigger, refresh_search_rows
+from apps.entrepreneurs_hub.search_cache import invalidate_search_results
+
+
+def refresh_range(bounds):
+    """Worker: refresh the stale rows of one primary-key range"""
+    start, end = bounds
+    updated = refresh_search_rows(Product.objects.filter(pk__gte=start, pk__lt=end))
+    return start, updated
+
 
 class Command(BaseCommand):
     help = 'Optimize search indexes and update search vectors'
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Product ids covered by each UPDATE'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Parallel worker processes, each with its own database connection'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default='optimize_search.checkpoint.json',
+            help='File recording finished batches so an interrupted run can resume'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and start from the first batch'
+        )
+        parser.add_argument(
+            '--install-trigger',
+            action='store_true',
+            help='Maintain search vectors in a database trigger (set SEARCH_VECTOR_TRIGGER=True too)'
+        )
+        parser.add_argument(
+            '--drop-trigger',
+            action='store_true',
+            help='Remove the database trigger and go back to the post_save update'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Updating search vectors...')
-        
-        for product in Product.objects.all():
-            Product.objects.filter(pk=product.pk).update(
-                search_vector=SearchVector('name', weight='A') + 
-                             SearchVector('description', weight='B') + 
-                             SearchVector('category', weight='C'),
-                popularity_score=product.views * 0.1
-            )
-        
+        if options['install_trigger'] and options['drop_trigger']:
+            raise CommandError('Use either --install-trigger or --drop-trigger, not both.')
+        if options['install_trigger']:
+            install_search_trigger(connection)
+            self.stdout.write(self.style.SUCCESS('Installed the product search trigger'))
+            if not settings.SEARCH_VECTOR_TRIGGER:
+                self.stdout.write('Set SEARCH_VECTOR_TRIGGER=True so saves skip the post_save update.')
+        elif options['drop_trigger']:
+            drop_search_trigger(connection)
+            self.stdout.write(self.style.SUCCESS('Dropped the product search trigger'))
+            if settings.SEARCH_VECTOR_TRIGGER:
+                self.stdout.write('Unset SEARCH_VECTOR_TRIGGER, or saves will stop updating search vectors.')
+
+        self.reindex(options)
+
+    def reindex(self, options):
+        batch_size = options['batch_size']
+        checkpoint = options['checkpoint']
+        bounds = Product.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.SUCCESS('No products to index'))
+            return
+
+        done = set()
+        if os.path.exists(checkpoint) and not options['restart']:
+            with open(checkpoint) as handle:
+                state = json.load(handle)
+            if state.get('batch_size') == batch_size:
+                done = set(state['done'])
+                self.stdout.write(f'Resuming: {len(done)} batches already finished')
+
+        batches = [
+            (start, start + batch_size)
+            for start in range(bounds['first'], bounds['last'] + 1, batch_size)
+            if start not in done
+        ]
+        total = len(batches) + len(done)
+        self.stdout.write(f'Updating search vectors: {len(batches)} of {total} batches to go...')
+
+        started = time.perf_counter()
+        updated = 0
+        workers = max(1, options['workers'])
+        if workers == 1:
+            results = map(refresh_range, batches)
+        else:
+            # Forked workers must not share the parent's connection
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(workers)
+            results = pool.imap_unordered(refresh_range, batches)
+
+        try:
+            for start, count in results:
+                updated += count
+                done.add(start)
+                self.save_checkpoint(checkpoint, batch_size, done)
+                self.stdout.write(
+                    f'  {len(done)}/{total} batches, {updated} stale rows refreshed '
+                    f'({time.perf_counter() - started:.1f}s)'
+                )
+        finally:
+            if workers > 1:
+                pool.terminate()
+
+        # Cached search results may rank or match differently now
+        invalidate_search_results()
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
         self.stdout.write(
-            self.style.SUCCESS('Successfully optimized search indexes')
+            self.style.SUCCESS(f'Successfully optimized search indexes ({updated} rows refreshed)')
         )
+
+    def save_checkpoint(self, path, batch_size, done):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump({'batch_size': batch_size, 'done': sorted(done)}, handle)
+        os.replace(temporary, path)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.entrepreneurs_hub.categories import rebuild_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the product counts stored for every category'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_category_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt counts for {rebuilt} categories')
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from apps.entrepreneurs_hub.models import Product
+from apps.entrepreneurs_hub.ratings import rating_aggregate_expressions
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rating sum, count and star histogram stored on every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report products whose stored aggregates have drifted'
+        )
+
+    def handle(self, *args, **options):
+        expressions = rating_aggregate_expressions()
+        actual = {f'actual_{field}': expression for field, expression in expressions.items()}
+
+        drifted = Q()
+        for field in expressions:
+            drifted |= ~Q(**{field: F(f'actual_{field}')})
+        drifted_ids = list(
+            Product.objects.annotate(**actual).filter(drifted).values_list('pk', flat=True)
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted_ids)} products have drifted rating aggregates')
+            return
+
+        # One UPDATE recomputes every drifted product from its Rating rows
+        updated = Product.objects.filter(pk__in=drifted_ids).update(**expressions)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rating aggregates for {updated} products')
+        )
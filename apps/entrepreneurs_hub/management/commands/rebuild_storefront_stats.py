@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.entrepreneurs_hub.stats import rebuild_storefront_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the product, review and rating totals stored for every storefront'
+
+    def handle(self, *args, **options):
+        # Storefront totals are summed from the products' rating aggregates;
+        # run rebuild_rating_aggregates first if those may have drifted too
+        rebuilt = rebuild_storefront_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt stats for {rebuilt} storefronts')
+        )
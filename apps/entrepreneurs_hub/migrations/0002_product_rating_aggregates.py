@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:16
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('entrepreneurs_hub', 'Product')
+    Rating = apps.get_model('entrepreneurs_hub', 'Rating')
+    ratings = Rating.objects.filter(product=OuterRef('pk')).order_by().values('product')
+
+    def aggregate(expression):
+        return Coalesce(
+            Subquery(ratings.annotate(value=expression).values('value')[:1], output_field=IntegerField()),
+            Value(0)
+        )
+
+    Product.objects.update(
+        rating_sum=aggregate(Sum('rating')),
+        rating_count=aggregate(Count('pk')),
+        **{f'stars_{stars}': aggregate(Count('pk', filter=Q(rating=stars))) for stars in range(1, 6)}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entrepreneurs_hub', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stars_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stars_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stars_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stars_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stars_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_storefront_stats(apps, schema_editor):
+    Storefront = apps.get_model('entrepreneurs_hub', 'Storefront')
+    StorefrontStats = apps.get_model('entrepreneurs_hub', 'StorefrontStats')
+    rows = Storefront.objects.order_by().annotate(
+        n_products=Count('product'),
+        n_available=Count('product', filter=Q(product__availability=True)),
+        n_reviews=Coalesce(Sum('product__rating_count'), 0),
+        n_rating_sum=Coalesce(Sum('product__rating_sum'), 0),
+    ).values_list('pk', 'n_products', 'n_available', 'n_reviews', 'n_rating_sum')
+    StorefrontStats.objects.bulk_create([
+        StorefrontStats(
+            store_id=store_id,
+            product_count=n_products,
+            available_product_count=n_available,
+            review_count=n_reviews,
+            rating_sum=n_rating_sum
+        )
+        for store_id, n_products, n_available, n_reviews, n_rating_sum in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entrepreneurs_hub', '0002_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorefrontStats',
+            fields=[
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='entrepreneurs_hub.storefront')),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('available_product_count', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Storefront stats',
+                'verbose_name_plural': 'Storefront stats',
+            },
+        ),
+        migrations.RunPython(populate_storefront_stats, migrations.RunPython.noop),
+    ]
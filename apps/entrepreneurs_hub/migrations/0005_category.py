@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def merge_categories(apps, schema_editor):
+    """
+    One Category per case/whitespace-insensitive key, named after its most
+    used spelling; every product is pointed at it and takes that spelling.
+    """
+    Product = apps.get_model('entrepreneurs_hub', 'Product')
+    Category = apps.get_model('entrepreneurs_hub', 'Category')
+    variants = {}
+    for spelling, uses in Product.objects.order_by().values_list('category').annotate(uses=Count('pk')):
+        name = ' '.join((spelling or '').split())
+        if name:
+            variants.setdefault(name.lower(), []).append((uses, name, spelling))
+
+    for key, spellings in variants.items():
+        spellings.sort(key=lambda variant: (-variant[0], variant[1]))
+        canonical = spellings[0][1]
+        category = Category.objects.create(name=canonical, key=key)
+        Product.objects.filter(category__in=[spelling for _, _, spelling in spellings]).update(
+            category=canonical, normalized_category=category
+        )
+
+    for category in Category.objects.annotate(
+        n_products=Count('products'),
+        n_available=Count('products', filter=Q(products__availability=True)),
+    ):
+        category.product_count = category.n_products
+        category.available_product_count = category.n_available
+        category.save(update_fields=['product_count', 'available_product_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entrepreneurs_hub', '0004_cachegeneration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('category_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('available_product_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Category',
+                'verbose_name_plural': 'Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='entrepreneu_categor_385468_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='normalized_category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='entrepreneurs_hub.category'),
+        ),
+        migrations.RunPython(merge_categories, migrations.RunPython.noop),
+    ]
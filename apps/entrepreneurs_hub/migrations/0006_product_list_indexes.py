@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:38
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entrepreneurs_hub', '0005_category'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='entrepreneu_availab_5f1f94_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'product_id'], name='entrepreneu_created_fd85b9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['availability', 'created_at'], name='entrepreneu_availab_189295_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['normalized_category', 'created_at'], name='entrepreneu_normali_2d750f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['store_id', 'price'], name='entrepreneu_store_i_92643d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storefront',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='storefront_name_upper_idx'),
+        ),
+    ]
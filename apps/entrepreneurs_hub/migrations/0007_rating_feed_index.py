@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entrepreneurs_hub', '0006_product_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['product', 'created_at', 'rating_id'], name='entrepreneu_product_78e609_idx'),
+        ),
+    ]
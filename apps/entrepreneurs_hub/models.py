@@ -3,6 +3,7 @@ from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 class Owner(models.Model):
@@ -40,27 +41,20 @@ class Storefront(models.Model):
     total_sales = models.IntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
 
+    def get_stats(self):
+        try:
+            return self.stats
+        except StorefrontStats.DoesNotExist:
+            return StorefrontStats(store=self)
+
     def get_average_rating(self):
-        products = self.product_set.all()
-        if not products:
-            return 0.0
-        
-        total_ratings = 0
-        total_count = 0
-        
-        for product in products:
-            ratings = product.ratings.all()
-            if ratings:
-                total_ratings += sum(rating.rating for rating in ratings)
-                total_count += len(ratings)
-        
-        return round(total_ratings / total_count, 1) if total_count > 0 else 0.0
+        return self.get_stats().average_rating
 
     def get_total_products(self):
-        return self.product_set.count()
+        return self.get_stats().product_count
 
     def get_total_reviews(self):
-        return sum(product.get_rating_count() for product in self.product_set.all())
+        return self.get_stats().review_count
 
     def __str__(self):
         return self.name
@@ -69,6 +63,55 @@ class Storefront(models.Model):
         verbose_name = 'Storefront'
         verbose_name_plural = 'Storefronts'
         ordering = ['store_id']
+        indexes = [
+            # store_id__name__iexact compares UPPER(name)
+            models.Index(Upper('name'), name='storefront_name_upper_idx'),
+        ]
+
+
+class StorefrontStats(models.Model):
+    """Per-storefront totals, kept in step with product and rating writes by signals"""
+    store = models.OneToOneField(Storefront, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    product_count = models.PositiveIntegerField(default=0)
+    available_product_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def average_rating(self):
+        # Weighted by review count: every rating of every product counts once
+        if self.review_count:
+            return round(self.rating_sum / self.review_count, 1)
+        return 0.0
+
+    def __str__(self):
+        return f"Stats for {self.store}"
+
+    class Meta:
+        verbose_name = 'Storefront stats'
+        verbose_name_plural = 'Storefront stats'
+
+
+class Category(models.Model):
+    """
+    Normalized product category. key is the lower-cased name, so case
+    variants of the same category share one row; product counts are kept in
+    step with Product writes by signals.
+    """
+    category_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=50, unique=True)
+    product_count = models.PositiveIntegerField(default=0)
+    available_product_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Category"
+        verbose_name_plural = "Categories"
+        ordering = ['name']
 
 
 class Product(models.Model):
@@ -78,6 +121,11 @@ class Product(models.Model):
     name = models.CharField(max_length=100)
     image = models.URLField(default='https://images.pexels.com/photos/789327/pexels-photo-789327.jpeg', blank=True, null=True)
     category = models.CharField(max_length=50)
+    # Set from category on save; category keeps the canonical name as text
+    # for the search vector
+    normalized_category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, related_name='products', blank=True, null=True
+    )
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     availability = models.BooleanField(default=True)
@@ -87,14 +135,43 @@ class Product(models.Model):
     search_vector = SearchVectorField(null=True, blank=True)
     popularity_score = models.FloatField(default=0.0)
 
+    # Rating aggregates, kept in step with Rating rows by signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    STAR_FIELDS = ('stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    # Columns written only by signals and set-based UPDATEs (views by the
+    # ViewCounter flush)
+    DERIVED_FIELDS = ('search_vector', 'popularity_score', 'views', 'rating_sum', 'rating_count', *STAR_FIELDS)
+
+    def save(self, *args, **kwargs):
+        # A plain save() of an existing product must not write back stale
+        # in-memory copies of the derived columns
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        elif kwargs.get('update_fields') is not None and 'category' in kwargs['update_fields']:
+            # The category is resolved to its Category row during the save
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'normalized_category'}
+        super().save(*args, **kwargs)
+
     def get_average_rating(self):
-        ratings = self.ratings.all()
-        if ratings:
-            return round(sum(rating.rating for rating in ratings) / len(ratings), 1)
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
         return 0.0
 
     def get_rating_count(self):
-        return self.ratings.count()
+        return self.rating_count
+
+    def get_rating_histogram(self):
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(1, 6)}
 
     def __str__(self):
         return self.name
@@ -105,10 +182,13 @@ class Product(models.Model):
         ordering = ['name']
         indexes = [
             GinIndex(fields=['search_vector']),
-            models.Index(fields=['category']),
             models.Index(fields=['price']),
-            models.Index(fields=['availability']),
             models.Index(fields=['popularity_score']),
+            # Composites for ProductListAPIView's filter + ordering combinations
+            models.Index(fields=['created_at', 'product_id']),
+            models.Index(fields=['availability', 'created_at']),
+            models.Index(fields=['normalized_category', 'created_at']),
+            models.Index(fields=['store_id', 'price']),
         ]
 
 
@@ -129,6 +209,23 @@ class Rating(models.Model):
         verbose_name = "Rating"
         verbose_name_plural = "Ratings"
         ordering = ['-created_at']
+        indexes = [
+            # Newest-first ratings feed of one product
+            models.Index(fields=['product', 'created_at', 'rating_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.name} - {self.product.name} - {self.rating} stars"
+
+
+class CacheGeneration(models.Model):
+    """
+    Shared counters that tell every worker when its process-local caches of
+    hub data are stale; bumped from signals whenever that data is written.
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    generation = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.user.username} - {self.product.name} - {self.rating} stars"
+        return f"{self.key}: {self.generation}"
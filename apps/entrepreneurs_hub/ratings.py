@@ -0,0 +1,61 @@
+"""
+Incremental upkeep of the rating aggregates stored on Product.
+
+Every Rating write turns into a single UPDATE of its product's rating_sum,
+rating_count and star histogram columns (plus one for the storefront's
+stats), so reading an average never has to touch the ratings table.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Product, Rating
+from .stats import adjust_product_store_stats
+
+
+def star_field(stars):
+    return f'stars_{int(stars)}'
+
+
+def adjust_rating_aggregates(product_id, added=None, removed=None, rebuild_stats=True):
+    """Apply one rating value being added and/or removed to its product"""
+    changes = {}
+    if added is not None:
+        changes['rating_sum'] = int(added)
+        changes['rating_count'] = 1
+        changes[star_field(added)] = 1
+    if removed is not None:
+        changes['rating_sum'] = changes.get('rating_sum', 0) - int(removed)
+        changes['rating_count'] = changes.get('rating_count', 0) - 1
+        changes[star_field(removed)] = changes.get(star_field(removed), 0) - 1
+
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes:
+        return
+    Product.objects.filter(pk=product_id).update(**{
+        field: F(field) + delta for field, delta in changes.items()
+    })
+    adjust_product_store_stats(
+        product_id,
+        reviews=changes.get('rating_count', 0),
+        rating_sum=changes.get('rating_sum', 0),
+        rebuild=rebuild_stats
+    )
+
+
+def rating_aggregate_expressions():
+    """Subquery expressions recomputing every aggregate column from Rating rows"""
+    ratings = Rating.objects.filter(product=OuterRef('pk')).order_by().values('product')
+
+    def aggregate(expression):
+        return Coalesce(
+            Subquery(ratings.annotate(value=expression).values('value')[:1], output_field=IntegerField()),
+            Value(0)
+        )
+
+    expressions = {
+        'rating_sum': aggregate(Sum('rating')),
+        'rating_count': aggregate(Count('pk')),
+    }
+    for stars in range(1, 6):
+        expressions[star_field(stars)] = aggregate(Count('pk', filter=Q(rating=stars)))
+    return expressions
@@ -0,0 +1,125 @@
+"""
+Ranked product search over the GIN-indexed Product.search_vector.
+
+Queries are parsed with websearch_to_tsquery, so users can type quoted
+phrases, "or" and -exclusions. Matches are scored by full-text rank, boosted
+for available products and nudged by popularity. Storefront-name matches
+are resolved first against the small storefront table and folded in by id,
+so the product side stays on index scans.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import BooleanField, Case, F, FloatField, Func, Q, Value, When
+from django.db.models.functions import Coalesce, Ln
+
+from .models import Product, Storefront
+
+# Available products score this much higher (as a multiplier on the rank)
+AVAILABLE_BOOST = 0.5
+# Weight of ln(1 + popularity_score) (see compute_popularity), small enough
+# to only break near-ties
+POPULARITY_WEIGHT = 0.02
+# Rank credited to a product whose storefront name matches the query
+STORE_MATCH_RANK = 0.3
+
+
+def search_vector_expression():
+    return (
+        SearchVector('name', weight='A') +
+        SearchVector('description', weight='B') +
+        SearchVector('category', weight='C')
+    )
+
+
+def product_search_query(text):
+    return SearchQuery(text, search_type='websearch')
+
+
+def matching_store_ids(search_query):
+    return list(
+        Storefront.objects.annotate(document=SearchVector('name')).filter(
+            document=search_query
+        ).values_list('pk', flat=True)
+    )
+
+
+def ranked_products(text, queryset=None):
+    """Products matching a websearch-style query, best match first"""
+    queryset = Product.objects.all() if queryset is None else queryset
+    search_query = product_search_query(text)
+    store_ids = matching_store_ids(search_query)
+
+    matches = Q(search_vector=search_query)
+    store_rank = Value(0.0)
+    if store_ids:
+        matches |= Q(store_id__in=store_ids)
+        store_rank = Case(When(store_id__in=store_ids, then=Value(STORE_MATCH_RANK)), default=Value(0.0))
+
+    text_rank = Coalesce(SearchRank(F('search_vector'), search_query), Value(0.0), output_field=FloatField())
+    availability = Case(When(availability=True, then=Value(1.0)), default=Value(0.0))
+
+    return queryset.filter(matches).annotate(
+        search_rank=text_rank + store_rank,
+        search_score=(
+            (text_rank + store_rank) * (Value(1.0) + Value(AVAILABLE_BOOST) * availability) +
+            Value(POPULARITY_WEIGHT) * Ln(Value(1.0) + F('popularity_score'))
+        ),
+    ).order_by('-search_score', '-created_at', '-product_id')
+
+
+class IsDistinctFrom(Func):
+    """NULL-safe inequality, true when the two sides differ"""
+    arg_joiner = ' IS DISTINCT FROM '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def stale_search_rows():
+    """Condition matching products whose search vector is out of date"""
+    return Q(IsDistinctFrom(F('search_vector'), search_vector_expression()))
+
+
+def refresh_search_rows(queryset):
+    """Recompute the search vector for the stale rows of queryset in one UPDATE"""
+    return queryset.filter(stale_search_rows()).update(search_vector=search_vector_expression())
+
+
+SEARCH_TRIGGER_NAME = 'entrepreneurs_hub_product_search'
+
+# Same document as search_vector_expression(); only recomputed when one of
+# its columns actually changed
+SEARCH_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION {SEARCH_TRIGGER_NAME}() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+        OR NEW.name IS DISTINCT FROM OLD.name
+        OR NEW.description IS DISTINCT FROM OLD.description
+        OR NEW.category IS DISTINCT FROM OLD.category THEN
+        NEW.search_vector :=
+            setweight(to_tsvector(COALESCE(NEW.name, '')), 'A') ||
+            setweight(to_tsvector(COALESCE(NEW.description, '')), 'B') ||
+            setweight(to_tsvector(COALESCE(NEW.category, '')), 'C');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS {SEARCH_TRIGGER_NAME} ON {{table}};
+CREATE TRIGGER {SEARCH_TRIGGER_NAME}
+    BEFORE INSERT OR UPDATE ON {{table}}
+    FOR EACH ROW EXECUTE FUNCTION {SEARCH_TRIGGER_NAME}();
+"""
+
+DROP_SEARCH_TRIGGER_SQL = f"""
+DROP TRIGGER IF EXISTS {SEARCH_TRIGGER_NAME} ON {{table}};
+DROP FUNCTION IF EXISTS {SEARCH_TRIGGER_NAME}();
+"""
+
+
+def install_search_trigger(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_TRIGGER_SQL.format(table=connection.ops.quote_name(Product._meta.db_table)))
+
+
+def drop_search_trigger(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_SEARCH_TRIGGER_SQL.format(table=connection.ops.quote_name(Product._meta.db_table)))
@@ -0,0 +1,120 @@
+"""
+Process-local cache of AdvancedSearchView results.
+
+Entries are keyed by the normalized query and filters and hold the ordered
+product ids of the ranked result, so a repeated search skips the scoring
+query and only loads its page of products with one in_bulk call.
+
+The cache is a LocalCache on the SEARCH_RESULTS generation, which every
+Product and Storefront write bumps once it commits. The writing worker
+drops its entries straight away; other workers notice within
+REFRESH_INTERVAL seconds.
+"""
+import threading
+from collections import OrderedDict
+
+from apps.common.counting import DEFAULT_COUNT_CAP
+
+from .categories import category_key
+from .generations import SEARCH_RESULTS, LocalCache, bump_generation
+from .models import Product
+
+REFRESH_INTERVAL = 5.0
+MAX_ENTRIES = 256
+# One id past the count cap, so a full entry still reports "1000+"
+MAX_CACHED_IDS = DEFAULT_COUNT_CAP + 1
+
+
+def normalize_query(text):
+    return ' '.join((text or '').casefold().split())
+
+
+def _price(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def search_key(query, params):
+    """Cache key for a search; filters are read the way apply_filters reads them"""
+    availability = params.get('availability')
+    return (
+        normalize_query(query),
+        category_key(params.get('category')) or None,
+        _price(params.get('min_price')),
+        _price(params.get('max_price')),
+        availability.lower() == 'true' if availability else None,
+    )
+
+
+class SearchResults:
+    """LRU of search key -> (ordered product ids, whether the list is complete)"""
+
+    def __init__(self, size=MAX_ENTRIES):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, ids, complete):
+        with self.lock:
+            self.entries[key] = (ids, complete)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class CachedResults:
+    """
+    The ranked result as a sliceable sequence of products. Slices within the
+    cached ids are loaded with in_bulk; slices past the end of a truncated
+    list fall back to the live query.
+    """
+
+    def __init__(self, ids, complete, fallback):
+        self.ids = ids
+        self.complete = complete
+        self.fallback = fallback
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        # The paginator only takes [bottom:top] slices
+        start, stop = index.start or 0, index.stop
+        if not self.complete and (stop is None or stop > len(self.ids)):
+            return list(self.fallback()[start:stop])
+        page_ids = self.ids[start:stop]
+        products = Product.objects.select_related('store_id').in_bulk(page_ids)
+        return [products[product_id] for product_id in page_ids if product_id in products]
+
+
+results_cache = LocalCache(SEARCH_RESULTS, SearchResults, REFRESH_INTERVAL)
+
+
+def cached_search(query, params, run):
+    """
+    The result of run() (a ranked product queryset) for this search, served
+    from the cache when the same search ran since the last write.
+    """
+    key = search_key(query, params)
+    results = results_cache.get()
+    entry = results.get(key)
+    if entry is None:
+        ids = list(run().values_list('product_id', flat=True)[:MAX_CACHED_IDS])
+        entry = (ids, len(ids) < MAX_CACHED_IDS)
+        results.put(key, *entry)
+    return CachedResults(*entry, fallback=run)
+
+
+def invalidate_search_results():
+    """Call once a Product or Storefront write has committed"""
+    bump_generation(SEARCH_RESULTS)
+    results_cache.expire()
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.common.fieldsets import SparseFieldsetMixin
 from .models import Product, Storefront, Rating, Owner
 
 class OwnerSerializer(serializers.ModelSerializer):
@@ -17,11 +18,17 @@ class OwnerSerializer(serializers.ModelSerializer):
             'joined_date'
         ]
 
-class StorefrontSerializer(serializers.ModelSerializer):
+class StorefrontSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner = OwnerSerializer(read_only=True)
     average_rating = serializers.SerializerMethodField()
     total_products = serializers.SerializerMethodField()
     total_reviews = serializers.SerializerMethodField()
+
+    field_dependencies = {
+        'average_rating': ('stats__rating_sum', 'stats__review_count'),
+        'total_products': ('stats__product_count',),
+        'total_reviews': ('stats__review_count',),
+    }
     
     class Meta:
         model = Storefront
@@ -44,6 +51,8 @@ class StorefrontSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['store_id', 'owner']
 
+    # Totals come from the StorefrontStats row; select_related('stats') on
+    # the queryset keeps a storefront list at a constant number of queries
     def get_average_rating(self, obj):
         return obj.get_average_rating()
 
@@ -54,7 +63,8 @@ class StorefrontSerializer(serializers.ModelSerializer):
         return obj.get_total_reviews()
 
 class RatingSerializer(serializers.ModelSerializer):
-    user_name = serializers.CharField(source='user.username', read_only=True)
+    # The user model has no username; name is its display name
+    user_name = serializers.CharField(source='user.name', read_only=True)
     
     class Meta:
         model = Rating
@@ -67,12 +77,19 @@ class RatingSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     store_id = serializers.PrimaryKeyRelatedField(read_only = True)
     store_name = serializers.CharField(source='store_id.name', read_only=True)
     image = serializers.URLField(allow_blank=True, required=False)
     average_rating = serializers.SerializerMethodField()
     rating_count = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
+
+    field_dependencies = {
+        'average_rating': ('rating_sum', 'rating_count'),
+        'rating_count': ('rating_count',),
+        'rating_histogram': Product.STAR_FIELDS,
+    }
 
     class Meta:
         model = Product
@@ -89,7 +106,8 @@ class ProductSerializer(serializers.ModelSerializer):
             'availability',
             'created_at',
             'average_rating',
-            'rating_count'
+            'rating_count',
+            'rating_histogram'
         ]
 
     def get_average_rating(self, obj):
@@ -97,3 +115,6 @@ class ProductSerializer(serializers.ModelSerializer):
 
     def get_rating_count(self, obj):
         return obj.get_rating_count()
+
+    def get_rating_histogram(self, obj):
+        return obj.get_rating_histogram()
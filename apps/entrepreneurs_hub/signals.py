@@ -1,19 +1,187 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.conf import settings
+from django.db import transaction
 from django.dispatch import receiver
-from django.contrib.postgres.search import SearchVector
-from .models import Product
+from apps.common.landing import HUB_SECTIONS, invalidate_sections
+from . import autocomplete, spelling
+from .categories import adjust_category_counts, category_key, resolve_category
+from .generations import PRODUCT_NAMES, record_change
+from .models import Product, Rating, Storefront, StorefrontStats
+from .ratings import adjust_rating_aggregates
+from .search import search_vector_expression
+from .search_cache import invalidate_search_results
+from .stats import adjust_storefront_stats
 
 @receiver(post_save, sender=Product)
 def update_search_vector(sender, instance, created, **kwargs):
+    if settings.SEARCH_VECTOR_TRIGGER:
+        # The database trigger already filled the column during the save
+        return
+
     if kwargs.get('update_fields') and 'search_vector' in kwargs.get('update_fields', []):
         return
     
     if kwargs.get('update_fields') and 'popularity_score' in kwargs.get('update_fields', []):
         return
     
-    Product.objects.filter(pk=instance.pk).update(
-        search_vector=SearchVector('name', weight='A') + 
-                     SearchVector('description', weight='B') + 
-                     SearchVector('category', weight='C'),
-        popularity_score=instance.views * 0.1
+    # popularity_score is owned by the compute_popularity job
+    Product.objects.filter(pk=instance.pk).update(search_vector=search_vector_expression())
+
+@receiver(pre_save, sender=Rating)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = Rating.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'rating'
+        ).first()
+
+@receiver(post_save, sender=Rating)
+def update_rating_aggregates(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        adjust_rating_aggregates(instance.product_id, added=instance.rating)
+    elif previous[0] == instance.product_id:
+        adjust_rating_aggregates(instance.product_id, added=instance.rating, removed=previous[1])
+    else:
+        adjust_rating_aggregates(previous[0], removed=previous[1])
+        adjust_rating_aggregates(instance.product_id, added=instance.rating)
+
+@receiver(post_delete, sender=Rating)
+def remove_from_rating_aggregates(sender, instance, **kwargs):
+    # A storefront delete (or its owner's) removes the stats row before the
+    # cascaded ratings, and rebuilding it here would re-create a row for the
+    # storefront being deleted
+    adjust_rating_aggregates(instance.product_id, removed=instance.rating, rebuild_stats=False)
+
+@receiver(post_save, sender=Storefront)
+def create_storefront_stats(sender, instance, created, **kwargs):
+    if created:
+        StorefrontStats.objects.get_or_create(store=instance)
+
+@receiver(pre_save, sender=Product)
+def assign_category(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'category' not in update_fields:
+        return
+    if instance.normalized_category is None or instance.normalized_category.key != category_key(instance.category):
+        instance.normalized_category = resolve_category(instance.category)
+    if instance.normalized_category is not None:
+        instance.category = instance.normalized_category.name
+
+@receiver(pre_save, sender=Product)
+def remember_previous_product(sender, instance, **kwargs):
+    instance._previous_product = None
+    if instance.pk is not None:
+        instance._previous_product = Product.objects.filter(pk=instance.pk).values_list(
+            'store_id', 'availability', 'rating_count', 'rating_sum', 'name', 'normalized_category_id'
+        ).first()
+
+@receiver(post_save, sender=Product)
+def update_storefront_stats(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_product', None)
+    if created or previous is None:
+        adjust_storefront_stats(instance.store_id_id, products=1, available=int(instance.availability))
+        return
+
+    store_id, availability, rating_count, rating_sum, name, category_id = previous
+    if store_id == instance.store_id_id:
+        adjust_storefront_stats(store_id, available=int(instance.availability) - int(availability))
+    else:
+        adjust_storefront_stats(
+            store_id, products=-1, available=-int(availability), reviews=-rating_count, rating_sum=-rating_sum
+        )
+        adjust_storefront_stats(
+            instance.store_id_id, products=1, available=int(instance.availability),
+            reviews=rating_count, rating_sum=rating_sum
+        )
+
+@receiver(post_delete, sender=Product)
+def remove_from_storefront_stats(sender, instance, **kwargs):
+    origin = kwargs.get('origin')
+    if getattr(origin, 'model', type(origin)) is not Product:
+        # Cascaded from deleting the storefront (or its owner), whose stats
+        # row is deleted along with it
+        return
+    # The product's ratings are deleted (and their totals removed) first
+    adjust_storefront_stats(instance.store_id_id, products=-1, available=-int(instance.availability))
+
+@receiver(post_save, sender=Product)
+def update_category_counts(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_product', None)
+    if created or previous is None:
+        adjust_category_counts(instance.normalized_category_id, products=1, available=int(instance.availability))
+        return
+
+    availability, category_id = previous[1], previous[5]
+    if category_id == instance.normalized_category_id:
+        adjust_category_counts(category_id, available=int(instance.availability) - int(availability))
+    else:
+        adjust_category_counts(category_id, products=-1, available=-int(availability))
+        adjust_category_counts(instance.normalized_category_id, products=1, available=int(instance.availability))
+
+@receiver(post_delete, sender=Product)
+def remove_from_category_counts(sender, instance, **kwargs):
+    adjust_category_counts(instance.normalized_category_id, products=-1, available=-int(instance.availability))
+
+def record_product_name(product_id, name, weight):
+    record_change(
+        PRODUCT_NAMES,
+        (autocomplete.index_cache, lambda index: index.add(autocomplete.PRODUCT, product_id, name, weight)),
+        (spelling.index_cache, lambda index: index.add(product_id, name)),
     )
+
+def forget_product_name(product_id):
+    record_change(
+        PRODUCT_NAMES,
+        (autocomplete.index_cache, lambda index: index.remove(autocomplete.PRODUCT, product_id)),
+        (spelling.index_cache, lambda index: index.remove(product_id)),
+    )
+
+@receiver(post_save, sender=Product)
+def update_name_indexes(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_product', None)
+    if created or previous is None or previous[4] != instance.name:
+        product_id, name, weight = instance.pk, instance.name, instance.popularity_score
+        transaction.on_commit(lambda: record_product_name(product_id, name, weight))
+
+@receiver(post_delete, sender=Product)
+def remove_from_name_indexes(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: forget_product_name(product_id))
+
+@receiver(pre_save, sender=Storefront)
+def remember_previous_storefront_name(sender, instance, **kwargs):
+    instance._previous_name = None
+    if instance.pk is not None:
+        instance._previous_name = Storefront.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+@receiver(post_save, sender=Storefront)
+def update_autocomplete_storefront(sender, instance, created, **kwargs):
+    if created or getattr(instance, '_previous_name', None) != instance.name:
+        store_id, name, weight = instance.pk, instance.name, instance.get_total_products()
+        transaction.on_commit(lambda: record_change(
+            PRODUCT_NAMES,
+            (autocomplete.index_cache, lambda index: index.add(autocomplete.STOREFRONT, store_id, name, weight)),
+        ))
+
+@receiver(post_delete, sender=Storefront)
+def remove_autocomplete_storefront(sender, instance, **kwargs):
+    store_id = instance.pk
+    transaction.on_commit(lambda: record_change(
+        PRODUCT_NAMES,
+        (autocomplete.index_cache, lambda index: index.remove(autocomplete.STOREFRONT, store_id)),
+    ))
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Storefront)
+@receiver(post_delete, sender=Storefront)
+def expire_search_results(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_search_results)
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Storefront)
+@receiver(post_delete, sender=Storefront)
+def expire_landing_sections(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_sections(HUB_SECTIONS))
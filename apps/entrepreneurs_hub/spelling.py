@@ -0,0 +1,159 @@
+"""
+Spelling corrections for SearchSuggestionsView.
+
+Symmetric-delete (SymSpell) dictionaries map every string reachable by
+deleting up to MAX_EDIT_DISTANCE characters from a name's first, and from
+its last, PREFIX_LENGTH characters to the names they came from. A lookup
+generates the same deletes for the query; only names found through both the
+prefix and the suffix dictionary can be within the distance, and just those
+are verified with a bounded Levenshtein distance that gives up as soon as a
+row exceeds the limit. Cost depends on the query, not on the size of the
+catalog.
+
+Like the autocomplete index, it lives in a LocalCache keyed on the
+PRODUCT_NAMES generation and is patched from signals.
+"""
+import threading
+
+from .generations import PRODUCT_NAMES, LocalCache
+from .models import Product
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+MAX_SUGGESTIONS = 5
+
+
+def bounded_distance(a, b, limit=MAX_EDIT_DISTANCE):
+    """
+    Levenshtein distance between a and b, or limit + 1 once it must exceed
+    limit. Only the diagonal band |i - j| <= limit is computed, and the scan
+    stops at the first row whose every cell is over the limit.
+    """
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+    if len(a) < len(b):
+        a, b = b, a
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        row_min = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != b[j - 1]),
+                over
+            )
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous = current
+    return previous[-1]
+
+
+def delete_variants(word, max_distance=MAX_EDIT_DISTANCE):
+    variants = {word}
+    frontier = [word]
+    for _ in range(max_distance):
+        next_frontier = []
+        for variant in frontier:
+            for position in range(len(variant)):
+                shorter = variant[:position] + variant[position + 1:]
+                if shorter not in variants:
+                    variants.add(shorter)
+                    next_frontier.append(shorter)
+        frontier = next_frontier
+    return variants
+
+
+class SpellingIndex:
+
+    def __init__(self):
+        # delete variant of the first / last PREFIX_LENGTH chars -> {lowercased name}
+        self.prefix_deletes = {}
+        self.suffix_deletes = {}
+        self.names = {}     # lowercased name -> {product_id: name}
+        self.members = {}   # product_id -> lowercased name
+        self.lock = threading.Lock()
+
+    def add(self, product_id, name):
+        with self.lock:
+            self._remove(product_id)
+            key = (name or '').lower()
+            if not key:
+                return
+            self.members[product_id] = key
+            if key not in self.names:
+                self.names[key] = {}
+                for deletes, variants in self._variants(key):
+                    for variant in variants:
+                        deletes.setdefault(variant, set()).add(key)
+            self.names[key][product_id] = name
+
+    def remove(self, product_id):
+        with self.lock:
+            self._remove(product_id)
+
+    def _remove(self, product_id):
+        key = self.members.pop(product_id, None)
+        if key is None:
+            return
+        names = self.names[key]
+        names.pop(product_id, None)
+        if not names:
+            del self.names[key]
+            for deletes, variants in self._variants(key):
+                for variant in variants:
+                    keys = deletes.get(variant)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del deletes[variant]
+
+    def _variants(self, key):
+        return (
+            (self.prefix_deletes, delete_variants(key[:PREFIX_LENGTH])),
+            (self.suffix_deletes, delete_variants(key[-PREFIX_LENGTH:])),
+        )
+
+    @staticmethod
+    def _lookup(deletes, variants):
+        found = set()
+        for variant in variants:
+            found.update(deletes.get(variant, ()))
+        return found
+
+    def suggest(self, query, limit=MAX_SUGGESTIONS):
+        """Names within MAX_EDIT_DISTANCE of the query (exact matches excluded), closest first"""
+        query = query.lower()
+        with self.lock:
+            (prefix_deletes, prefix_variants), (suffix_deletes, suffix_variants) = self._variants(query)
+            candidates = self._lookup(prefix_deletes, prefix_variants)
+            if candidates:
+                candidates &= self._lookup(suffix_deletes, suffix_variants)
+
+            matches = []
+            for key in candidates:
+                distance = bounded_distance(query, key)
+                if 0 < distance <= MAX_EDIT_DISTANCE:
+                    matches.extend((distance, name) for name in set(self.names[key].values()))
+        matches.sort()
+        return [name for distance, name in matches[:limit]]
+
+
+def build_index():
+    index = SpellingIndex()
+    for product_id, name in Product.objects.order_by().values_list('product_id', 'name'):
+        index.add(product_id, name)
+    return index
+
+
+index_cache = LocalCache(PRODUCT_NAMES, build_index)
+
+
+def suggest(query):
+    return index_cache.get().suggest(query)
@@ -0,0 +1,79 @@
+"""
+Incremental upkeep of StorefrontStats.
+
+Product and rating writes apply their deltas to the owning storefront's
+stats row with a single F() UPDATE, so the storefront directory reads every
+total from one joined row instead of walking products and ratings.
+"""
+from django.db.models import Count, F, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Product, Storefront, StorefrontStats
+
+_STAT_FIELDS = ('product_count', 'available_product_count', 'review_count', 'rating_sum')
+
+
+def adjust_storefront_stats(store_id, products=0, available=0, reviews=0, rating_sum=0):
+    """Apply deltas to a storefront's stats, rebuilding the row if it is missing"""
+    deltas = dict(zip(_STAT_FIELDS, (products, available, reviews, rating_sum)))
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if store_id is None or not deltas:
+        return
+    updated = StorefrontStats.objects.filter(store_id=store_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated:
+        # No row yet (e.g. created before the stats table); computing it from
+        # scratch already includes this change
+        rebuild_storefront_stats([store_id])
+
+
+def adjust_product_store_stats(product_id, reviews=0, rating_sum=0, rebuild=True):
+    """
+    Apply rating deltas to the stats of whichever storefront owns the product.
+    With rebuild=False a missing stats row is left missing.
+    """
+    if not (reviews or rating_sum):
+        return
+    store_id = Subquery(Product.objects.filter(pk=product_id).values('store_id')[:1])
+    updated = StorefrontStats.objects.filter(store_id=store_id).update(
+        review_count=F('review_count') + reviews,
+        rating_sum=F('rating_sum') + rating_sum
+    )
+    if not updated and rebuild:
+        rebuild_storefront_stats(Product.objects.filter(pk=product_id).values_list('store_id', flat=True))
+
+
+def rebuild_storefront_stats(store_ids=None):
+    """
+    Recompute stats from the products' stored rating aggregates and upsert
+    them in one statement. Returns the number of storefronts written.
+    """
+    storefronts = Storefront.objects.order_by()
+    if store_ids is not None:
+        storefronts = storefronts.filter(pk__in=list(store_ids))
+
+    rows = storefronts.annotate(
+        n_products=Count('product'),
+        n_available=Count('product', filter=Q(product__availability=True)),
+        n_reviews=Coalesce(Sum('product__rating_count'), 0),
+        n_rating_sum=Coalesce(Sum('product__rating_sum'), 0),
+    ).values_list('pk', 'n_products', 'n_available', 'n_reviews', 'n_rating_sum')
+
+    stats = [
+        StorefrontStats(
+            store_id=store_id,
+            product_count=n_products,
+            available_product_count=n_available,
+            review_count=n_reviews,
+            rating_sum=n_rating_sum
+        )
+        for store_id, n_products, n_available, n_reviews, n_rating_sum in rows
+    ]
+    StorefrontStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['store'],
+        update_fields=list(_STAT_FIELDS) + ['updated_at']
+    )
+    return len(stats)
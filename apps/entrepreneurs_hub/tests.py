@@ -1,3 +1,717 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from . import autocomplete, search_cache, spelling
+from .generations import SEARCH_RESULTS, LocalCache
+from .models import Category, Owner, Product, Rating, Storefront, StorefrontStats
+from .search import install_search_trigger, ranked_products
+from .serializers import ProductSerializer
+from .view_counter import ViewCounter
+from .views import filter_products, order_products
+
+
+class ProductListQueryPlanTests(TestCase):
+    """
+    Every filter combination ProductListAPIView supports must be answered
+    from an index once the catalog is large; a sequential scan of the
+    product table means an index was dropped or no longer matches the query.
+    """
+    PRODUCTS = 20000
+    STORES = 100
+    PAGE_SIZE = 12
+
+    COMBINATIONS = [
+        '',
+        'ordering=price',
+        'ordering=-price',
+        'ordering=popular',
+        'category=crafts',
+        'category=Crafts&availability=true',
+        'store=store 7',
+        'store=STORE 7&min_price=100&max_price=400',
+        'store=store 7&ordering=price',
+        'min_price=100&max_price=150',
+        'min_price=100&max_price=150&ordering=-price',
+        'availability=true',
+        'availability=false',
+        'availability=false&ordering=price',
+        'category=food&min_price=500&max_price=600',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(21)
+        stores = Storefront.objects.bulk_create(
+            [Storefront(name=f'Store {index}') for index in range(cls.STORES)]
+        )
+        categories = Category.objects.bulk_create([
+            Category(name=name, key=name.lower())
+            for name in ('Crafts', 'Food', 'Clothing', 'Accessories', 'Stationery', 'Art')
+        ])
+        # bulk_create skips the save signals, so categories are set directly
+        products = []
+        for index in range(cls.PRODUCTS):
+            category = rng.choice(categories)
+            products.append(Product(
+                store_id=rng.choice(stores),
+                name=f'Product {index}',
+                description='Seeded for query plan tests',
+                category=category.name,
+                normalized_category=category,
+                price=Decimal(rng.randint(2000, 200000)) / 100,
+                availability=rng.random() < 0.8,
+                views=rng.randint(0, 500),
+                popularity_score=rng.random() * 10,
+            ))
+        Product.objects.bulk_create(products, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Product._meta.db_table}')
+            cursor.execute(f'ANALYZE {Storefront._meta.db_table}')
+            cursor.execute(f'ANALYZE {Category._meta.db_table}')
+
+    def plan(self, query_string):
+        params = QueryDict(query_string)
+        queryset = order_products(filter_products(Product.objects.all(), params), params.get('ordering'))
+        return queryset[:self.PAGE_SIZE].explain()
+
+    def test_filter_combinations_use_indexes(self):
+        for query_string in self.COMBINATIONS:
+            with self.subTest(query=query_string or '(none)'):
+                plan = self.plan(query_string)
+                self.assertNotIn(f'Seq Scan on {Product._meta.db_table}', plan, plan)
+
+    def test_store_name_filter_uses_expression_index(self):
+        with connection.cursor() as cursor:
+            # A hundred storefronts are cheaper to scan than to look up, so
+            # rule scans out to check the index matches the iexact lookup
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = self.plan('store=store 7')
+        self.assertIn('storefront_name_upper_idx', plan, plan)
+
+
+class StorefrontDeleteTests(TestCase):
+    """Deletes that cascade through rated products must leave no stats row behind"""
+
+    def setUp(self):
+        self.owner_user = User.objects.create_user(email='owner@iut-dhaka.edu', password='Campus#1234', name='Owner')
+        self.rater = User.objects.create_user(email='rater@iut-dhaka.edu', password='Campus#1234', name='Rater')
+        self.owner = Owner.objects.create(user=self.owner_user, name='Owner')
+        self.store = Storefront.objects.create(owner=self.owner, name='Waffles')
+        product = Product.objects.create(
+            store_id=self.store, name='Waffle', description='Crisp', category='Food', price=Decimal('80.00')
+        )
+        Rating.objects.create(product=product, user=self.rater, rating=4)
+
+    def assert_store_gone(self):
+        # Deferred foreign keys are only checked at commit
+        connection.check_constraints()
+        self.assertFalse(StorefrontStats.objects.filter(store_id=self.store.pk).exists())
+
+    def test_delete_storefront_with_rated_products(self):
+        self.store.delete()
+        self.assert_store_gone()
+
+    def test_delete_owner_user_with_rated_products(self):
+        self.owner_user.delete()
+        self.assert_store_gone()
+
+    def test_delete_rater_updates_stats(self):
+        self.rater.delete()
+        stats = StorefrontStats.objects.get(store=self.store)
+        self.assertEqual((stats.review_count, stats.rating_sum), (0, 0))
+
+
+class RatingAggregateTests(TestCase):
+
+    def setUp(self):
+        self.raters = [
+            User.objects.create_user(email=f'{name.lower()}@iut-dhaka.edu', password='Campus#1234', name=name)
+            for name in ('Rahim', 'Karim')
+        ]
+        store = Storefront.objects.create(name='Waffles')
+        self.product = Product.objects.create(
+            store_id=store, name='Waffle', description='Crisp', category='Food', price=Decimal('80.00')
+        )
+
+    def rate(self, user, stars):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'/api/entrepreneurs_hub/products/{self.product.pk}/rate/', {'rating': stars}, format='json')
+
+    def assert_aggregates(self, rating_sum, rating_count, histogram):
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.rating_sum, self.product.rating_count), (rating_sum, rating_count))
+        self.assertEqual(self.product.get_rating_histogram(), {stars: histogram.get(stars, 0) for stars in range(1, 6)})
+
+    def test_new_changed_and_deleted_ratings(self):
+        self.rate(self.raters[0], 5)
+        response = self.rate(self.raters[1], 4)
+        self.assertEqual((response.data['average_rating'], response.data['rating_count']), (4.5, 2))
+        self.assert_aggregates(9, 2, {4: 1, 5: 1})
+
+        # Changing a rating moves it between histogram buckets
+        response = self.rate(self.raters[0], 2)
+        self.assertEqual(response.data['average_rating'], 3.0)
+        self.assert_aggregates(6, 2, {2: 1, 4: 1})
+
+        Rating.objects.get(user=self.raters[1]).delete()
+        self.assert_aggregates(2, 1, {2: 1})
+
+    def test_rebuild_repairs_drift(self):
+        self.rate(self.raters[0], 5)
+        Product.objects.filter(pk=self.product.pk).update(rating_sum=40, rating_count=9, stars_1=3)
+
+        out = StringIO()
+        call_command('rebuild_rating_aggregates', dry_run=True, stdout=out)
+        self.assertIn('1 products have drifted', out.getvalue())
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.assert_aggregates(5, 1, {5: 1})
+
+    def test_listing_never_reads_ratings(self):
+        self.rate(self.raters[0], 3)
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get('/api/entrepreneurs_hub/products/')
+        self.assertEqual(response.data['results'][0]['average_rating'], 3.0)
+        self.assertFalse([query for query in queries if Rating._meta.db_table in query['sql']])
+
+
+class SearchReindexTests(TestCase):
+
+    def setUp(self):
+        store = Storefront.objects.create(name='Waffles')
+        self.products = [
+            Product.objects.create(
+                store_id=store, name=f'{word} Waffle', description='Crisp', category='Food', price=Decimal('80.00')
+            )
+            for word in ('Belgian', 'Chocolate', 'Honey', 'Berry', 'Plain')
+        ]
+        self.pks = [product.pk for product in self.products]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, 'checkpoint.json')
+
+    def reindex(self, **options):
+        out = StringIO()
+        call_command('optimize_search', batch_size=2, checkpoint=self.checkpoint, stdout=out, **options)
+        return out.getvalue()
+
+    def stale(self, *pks):
+        Product.objects.filter(pk__in=pks).update(search_vector=None)
+
+    def found(self, text):
+        return list(ranked_products(text).values_list('pk', flat=True))
+
+    def test_only_stale_rows_are_refreshed(self):
+        self.stale(self.pks[1], self.pks[4])
+        self.assertEqual(self.found('chocolate'), [])
+        self.assertIn('(2 rows refreshed)', self.reindex())
+        self.assertEqual(self.found('chocolate'), [self.pks[1]])
+        self.assertIn('(0 rows refreshed)', self.reindex())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_the_checkpoint(self):
+        first = self.pks[0]
+        with open(self.checkpoint, 'w') as handle:
+            json.dump({'batch_size': 2, 'done': [first]}, handle)
+        self.stale(self.pks[0], self.pks[4])
+
+        output = self.reindex()
+        self.assertIn('Resuming: 1 batches already finished', output)
+        self.assertIn('(1 rows refreshed)', output)
+        # The batch recorded as finished was skipped
+        self.assertEqual(self.found('belgian'), [])
+        self.assertEqual(self.found('plain'), [self.pks[4]])
+
+    def test_restart_ignores_the_checkpoint(self):
+        with open(self.checkpoint, 'w') as handle:
+            json.dump({'batch_size': 2, 'done': [self.pks[0]]}, handle)
+        self.stale(self.pks[0])
+        self.assertIn('(1 rows refreshed)', self.reindex(restart=True))
+
+    def vector_updates(self, product):
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+        return [query for query in queries if query['sql'].startswith('UPDATE') and 'search_vector' in query['sql']]
+
+    def test_trigger_replaces_the_second_update(self):
+        product = self.products[0]
+        product.name = 'Liege Waffle'
+        self.assertEqual(len(self.vector_updates(product)), 1)
+
+        install_search_trigger(connection)
+        product.name = 'Brussels Waffle'
+        with override_settings(SEARCH_VECTOR_TRIGGER=True):
+            self.assertEqual(self.vector_updates(product), [])
+        self.assertEqual(self.found('brussels'), [product.pk])
+
+
+class PopularityScoreTests(TestCase):
+
+    def setUp(self):
+        store = Storefront.objects.create(name='Waffles')
+        now = timezone.now()
+        # name -> (views, age in days, available)
+        self.products = {}
+        for name, views, age, available in [
+            ('Fresh', 100, 1, True),
+            ('Old', 100, 365, True),
+            ('Sold Out', 100, 1, False),
+            ('Unseen', 0, 1, True),
+        ]:
+            product = Product.objects.create(
+                store_id=store, name=name, description='Crisp', category='Food', price=Decimal('80.00'),
+                availability=available
+            )
+            Product.objects.filter(pk=product.pk).update(views=views, created_at=now - timedelta(days=age))
+            self.products[name] = product
+
+    def compute(self, **options):
+        out = StringIO()
+        call_command('compute_popularity', stdout=out, **options)
+        return out.getvalue()
+
+    def ranking(self):
+        return list(order_products(Product.objects.all(), 'popular').values_list('name', flat=True))
+
+    def test_views_recency_and_availability_shape_the_ranking(self):
+        self.compute(batch_size=1)
+        self.assertEqual(self.ranking(), ['Fresh', 'Sold Out', 'Old', 'Unseen'])
+
+    def test_good_ratings_lift_a_product(self):
+        self.compute()
+        before = Product.objects.get(name='Old').popularity_score
+        raters = [
+            User.objects.create_user(email=f'{name.lower()}@iut-dhaka.edu', password='Campus#1234', name=name)
+            for name in ('Rahim', 'Karim', 'Salma')
+        ]
+        for rater in raters:
+            Rating.objects.create(product=self.products['Old'], user=rater, rating=5)
+        self.compute()
+        self.assertGreater(Product.objects.get(name='Old').popularity_score, before)
+
+    def test_dry_run_and_unchanged_scores_write_nothing(self):
+        # Unseen still scores 0
+        self.assertIn('3 changed', self.compute(dry_run=True))
+        self.assertFalse(Product.objects.filter(popularity_score__gt=0).exists())
+        self.compute()
+        self.assertIn('0 changed', self.compute())
+
+
+class RatingsFeedTests(TestCase):
+    RATERS = ('Rahim', 'Karim', 'Salma', 'Nadia', 'Tanvir')
+
+    @classmethod
+    def setUpTestData(cls):
+        store = Storefront.objects.create(name='Waffles')
+        cls.product = Product.objects.create(
+            store_id=store, name='Waffle', description='Crisp', category='Food', price=Decimal('80.00')
+        )
+        for stars, name in enumerate(cls.RATERS, 1):
+            rater = User.objects.create_user(email=f'{name.lower()}@iut-dhaka.edu', password='Campus#1234', name=name)
+            Rating.objects.create(product=cls.product, user=rater, rating=stars, review=f'{stars} stars')
+
+    def feed(self, **params):
+        response = APIClient().get(f'/api/entrepreneurs_hub/products/{self.product.pk}/ratings/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_walk_newest_first_with_display_names(self):
+        names, cursor = [], None
+        while True:
+            # The product, then one page of ratings joined to their users
+            with self.assertNumQueries(2):
+                data = self.feed(page_size=2, **({'cursor': cursor} if cursor else {}))
+            names.extend(rating['user_name'] for rating in data['ratings'])
+            if not data['has_more']:
+                break
+            cursor = data['next_cursor']
+        self.assertEqual(names, list(reversed(self.RATERS)))
+
+    def test_aggregates_come_from_the_product(self):
+        data = self.feed(page_size=1)
+        self.assertEqual((data['average_rating'], data['rating_count']), (3.0, 5))
+        self.assertEqual(data['rating_histogram'], {1: 1, 2: 1, 3: 1, 4: 1, 5: 1})
+
+    def test_bad_cursor_and_unknown_product(self):
+        client = APIClient()
+        response = client.get(f'/api/entrepreneurs_hub/products/{self.product.pk}/ratings/', {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.get('/api/entrepreneurs_hub/products/999999/ratings/').status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Owner.objects.create(name='Owner')
+        store = Storefront.objects.create(owner=owner, name='Waffles')
+        for index in range(3):
+            Product.objects.create(
+                store_id=store, name=f'Waffle {index}', description='A long description ' * 20,
+                category='Food', price=Decimal(80 + index)
+            )
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, ' '.join(query['sql'] for query in queries)
+
+    def test_fields_narrow_the_response_and_the_select(self):
+        data, sql = self.get('/api/entrepreneurs_hub/products/', fields='name,price,store_name')
+        self.assertEqual(set(data['results'][0]), {'name', 'price', 'store_name'})
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"stars_1"', sql)
+        self.assertIn('"entrepreneurs_hub_storefront"."name"', sql)
+
+    def test_exclude_drops_fields(self):
+        data, sql = self.get('/api/entrepreneurs_hub/products/', exclude='description,rating_histogram')
+        self.assertEqual(set(data['results'][0]), set(ProductSerializer().fields) - {'description', 'rating_histogram'})
+        self.assertNotIn('"description"', sql)
+
+    def test_unrequested_method_fields_never_run(self):
+        with mock.patch.object(ProductSerializer, 'get_rating_histogram', return_value={}) as histogram:
+            self.get('/api/entrepreneurs_hub/products/', fields='name')
+            self.assertFalse(histogram.called)
+            self.get('/api/entrepreneurs_hub/products/')
+            self.assertTrue(histogram.called)
+
+    def test_storefront_cards_skip_the_owner(self):
+        data, sql = self.get('/api/entrepreneurs_hub/products/storefronts/', fields='name,total_products')
+        self.assertEqual(data[0], {'name': 'Waffles', 'total_products': 3})
+        self.assertNotIn('entrepreneurs_hub_owner', sql)
+
+    def test_unknown_names_are_ignored(self):
+        data, _ = self.get('/api/entrepreneurs_hub/products/', fields='name,password')
+        self.assertEqual(set(data['results'][0]), {'name'})
+
+
+class ProductViewCountTests(TestCase):
+
+    def test_edit_after_flush_keeps_flushed_views(self):
+        store = Storefront.objects.create(name='Waffles')
+        product = Product.objects.create(
+            store_id=store, name='Waffle', description='Crisp', category='Food', price=Decimal('80.00')
+        )
+        counter = ViewCounter()
+        self.addCleanup(counter.stop)
+        counter.record(product.pk, count=5)
+        counter.flush()
+
+        # The in-memory copy still has views=0
+        product.price = Decimal('90.00')
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual((product.views, product.price), (5, Decimal('90.00')))
+
+    def test_idle_worker_flushes_on_its_own(self):
+        counter = ViewCounter(flush_interval=0.01)
+        self.addCleanup(counter.stop)
+        flushed = threading.Event()
+        with mock.patch.object(counter, 'flush', side_effect=flushed.set):
+            # A single view, far below max_pending, and no further requests
+            counter.record(1)
+            self.assertTrue(flushed.wait(timeout=5))
+        self.assertTrue(counter.flusher.daemon)
+
+    def test_stop_writes_pending_views(self):
+        store = Storefront.objects.create(name='Waffles')
+        product = Product.objects.create(
+            store_id=store, name='Waffle', description='Crisp', category='Food', price=Decimal('80.00')
+        )
+        counter = ViewCounter(flush_interval=60)
+        counter.record(product.pk, count=3)
+        self.assertEqual(counter.stop(), 3)
+        self.assertFalse(counter.flusher.is_alive())
+        product.refresh_from_db()
+        self.assertEqual(product.views, 3)
+
+
+class SearchResultsCacheTests(TestCase):
+    PRODUCTS = 8
+
+    def setUp(self):
+        store = Storefront.objects.create(name='Waffles')
+        self.products = [
+            Product.objects.create(
+                store_id=store, name=f'Waffle {index}', description='Crisp', category='Food',
+                price=Decimal(10 + index)
+            )
+            for index in range(self.PRODUCTS)
+        ]
+        # A fresh process cache: generations bumped by earlier tests were
+        # rolled back, so the shared one could match a stale generation
+        patcher = mock.patch.object(search_cache, 'results_cache', LocalCache(
+            SEARCH_RESULTS, search_cache.SearchResults, search_cache.REFRESH_INTERVAL
+        ))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.runs = 0
+
+    def run_search(self):
+        self.runs += 1
+        return Product.objects.filter(name__startswith='Waffle').order_by('-price', 'product_id')
+
+    def search(self, query='waffle', **params):
+        return search_cache.cached_search(query, params, self.run_search)
+
+    def ids(self, products):
+        return [product.pk for product in products]
+
+    def test_repeated_search_is_served_from_cache(self):
+        first = self.search()
+        second = self.search(query='  WAFFLE ')
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(len(second), self.PRODUCTS)
+        self.assertEqual(self.ids(second[0:3]), self.ids(first[0:3]))
+        self.assertEqual(self.ids(second[0:3]), self.ids(self.run_search()[:3]))
+
+    def test_filters_are_part_of_the_key(self):
+        self.search()
+        self.search(min_price='12')
+        self.assertEqual(self.runs, 2)
+
+    def test_product_save_invalidates_once_committed(self):
+        self.search()
+        product = self.products[0]
+        product.price = Decimal('99.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        results = self.search()
+        self.assertEqual(self.runs, 2)
+        self.assertEqual(results[0:1][0].pk, product.pk)
+
+    def test_pages_past_the_cached_ids_use_the_live_query(self):
+        with mock.patch.object(search_cache, 'MAX_CACHED_IDS', 5):
+            results = self.search()
+        self.assertEqual((len(results), results.complete), (5, False))
+
+        expected = self.ids(self.run_search())
+        self.assertEqual(self.ids(results[0:3]), expected[0:3])
+        # Straddles the end of the cached ids, then lies wholly past it
+        self.assertEqual(self.ids(results[3:6]), expected[3:6])
+        self.assertEqual(self.ids(results[6:9]), expected[6:9])
+
+    def test_deleted_products_are_skipped(self):
+        results = self.search()
+        expected = self.ids(self.run_search())
+        # A queryset delete skips the signals, like a delete another worker
+        # made before this one refreshed
+        Product.objects.filter(pk=expected[1]).delete()
+        self.assertEqual(self.ids(results[0:3]), [expected[0], expected[2]])
+
+
+class CategoryTaxonomyTests(TestCase):
+
+    def setUp(self):
+        self.store = Storefront.objects.create(name='Waffles')
+
+    def create(self, name, category, availability=True):
+        return Product.objects.create(
+            store_id=self.store, name=name, description='Crisp', category=category, price=Decimal('80.00'),
+            availability=availability
+        )
+
+    def counts(self):
+        return {
+            name: (products, available)
+            for name, products, available in Category.objects.values_list('name', 'product_count', 'available_product_count')
+        }
+
+    def test_variants_share_one_category(self):
+        products = [self.create('Waffle', 'Food'), self.create('Crepe', '  food '), self.create('Toast', 'FOOD')]
+        self.assertEqual(Category.objects.count(), 1)
+        self.assertEqual({product.category for product in products}, {'Food'})
+        self.assertEqual(self.counts(), {'Food': (3, 3)})
+
+    def test_counts_follow_moves_availability_and_deletes(self):
+        waffle = self.create('Waffle', 'Food')
+        mug = self.create('Mug', 'Crafts', availability=False)
+
+        waffle.category = 'crafts'
+        waffle.save()
+        self.assertEqual(self.counts(), {'Food': (0, 0), 'Crafts': (2, 1)})
+
+        mug.availability = True
+        mug.save()
+        self.assertEqual(self.counts()['Crafts'], (2, 2))
+
+        mug.delete()
+        self.assertEqual(self.counts()['Crafts'], (1, 1))
+
+    def test_listing_and_filter_use_the_categories(self):
+        self.create('Waffle', 'Food')
+        self.create('Mug', 'Crafts')
+        moved = self.create('Crepe', 'Snacks')
+        moved.category = 'Food'
+        moved.save()
+
+        client = APIClient()
+        self.assertEqual(list(client.get('/api/entrepreneurs_hub/products/categories/').data), ['Crafts', 'Food'])
+        response = client.get('/api/entrepreneurs_hub/products/', {'category': 'fOOd'})
+        self.assertEqual(sorted(product['name'] for product in response.data['results']), ['Crepe', 'Waffle'])
+
+    def test_rebuild_repairs_drift(self):
+        self.create('Waffle', 'Food')
+        Category.objects.update(product_count=7, available_product_count=0)
+        call_command('rebuild_category_counts', stdout=StringIO())
+        self.assertEqual(self.counts(), {'Food': (1, 1)})
+
+
+class AutocompleteTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        )
+        store = Storefront.objects.create(name='Candle Corner')
+        for name in ('Candle Set', 'Scented Candle', 'Canvas Tote', 'Waffle'):
+            Product.objects.create(store_id=store, name=name, description='Handmade', category='Crafts', price=Decimal('50.00'))
+        # Fresh process caches: generations bumped by earlier tests were rolled back
+        for module in (autocomplete, spelling):
+            patcher = mock.patch.object(module, 'index_cache', LocalCache(
+                module.index_cache.key, module.build_index, module.index_cache.refresh_interval
+            ))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def suggest(self, query):
+        return self.client.get('/api/entrepreneurs_hub/search/autocomplete/', {'query': query}).data
+
+    def test_prefix_and_in_name_matches(self):
+        self.assertEqual(self.suggest('can'), ['Candle Set', 'Canvas Tote', 'Candle Corner', 'Scented Candle'])
+        self.assertEqual(self.suggest('  CANDLE  '), ['Candle Set', 'Candle Corner', 'Scented Candle'])
+        self.assertEqual(self.suggest('c'), [])
+
+    def test_keystrokes_skip_the_database(self):
+        self.suggest('can')
+        with self.assertNumQueries(0):
+            self.suggest('cand')
+            self.suggest('cand')
+
+    def test_popular_names_rank_first(self):
+        index = autocomplete.PrefixIndex()
+        index.add_many(autocomplete.PRODUCT, [(1, 'Mug Small', 1.0), (2, 'Mug Large', 5.0), (3, 'Mug Small', 9.0)])
+        self.assertEqual(index.suggest('mug'), ['Mug Small', 'Mug Large'])
+        index.remove(autocomplete.PRODUCT, 3)
+        self.assertEqual(index.suggest('mug'), ['Mug Large', 'Mug Small'])
+
+    def test_writes_patch_the_index_once_committed(self):
+        self.suggest('can')
+        product = Product.objects.get(name='Waffle')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Candy Floss'
+            product.save()
+        self.assertIn('Candy Floss', self.suggest('cand'))
+        self.assertEqual(self.suggest('waf'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(name='Canvas Tote').delete()
+        self.assertNotIn('Canvas Tote', self.suggest('can'))
+
+
+class SpellingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(email='student@iut-dhaka.edu', password='Campus#1234', name='Test Student')
+        )
+        store = Storefront.objects.create(name='Waffles')
+        for name in ('Waffle', 'Waffles', 'Wafer', 'Notebook', 'Chocolate Waffle Box'):
+            Product.objects.create(store_id=store, name=name, description='Sweet', category='Food', price=Decimal('50.00'))
+        patcher = mock.patch.object(spelling, 'index_cache', LocalCache(
+            spelling.index_cache.key, spelling.build_index, spelling.index_cache.refresh_interval
+        ))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def corrections(self, query):
+        return self.client.get('/api/entrepreneurs_hub/search/suggestions/', {'query': query}).data
+
+    def test_bounded_distance(self):
+        for a, b, distance in [
+            ('waffle', 'waffle', 0), ('wafle', 'waffle', 1), ('waffel', 'waffle', 2),
+            ('notbok', 'notebook', 2), ('kitten', 'sitting', 3), ('mug', 'notebook', 3),
+        ]:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(spelling.bounded_distance(a, b), distance)
+
+    def test_closest_names_first(self):
+        self.assertEqual(self.corrections('wafle'), ['Waffle', 'Wafer', 'Waffles'])
+        self.assertEqual(self.corrections('notbok'), ['Notebook'])
+        self.assertEqual(self.corrections('chocolate wafle box'), ['Chocolate Waffle Box'])
+
+    def test_exact_and_distant_names_are_not_suggested(self):
+        self.assertEqual(self.corrections('notebook'), [])
+        self.assertEqual(self.corrections('stapler'), [])
+
+    def test_renames_update_the_index(self):
+        self.assertEqual(self.corrections('notbok'), ['Notebook'])
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(name='Notebook')
+            product.name = 'Sketchbook'
+            product.save()
+        self.assertEqual(self.corrections('notbok'), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.corrections('sketchbok'), ['Sketchbook'])
+
+
+class ProductFacetsTests(TestCase):
+    URL = '/api/entrepreneurs_hub/products/facets/'
+
+    @classmethod
+    def setUpTestData(cls):
+        waffles = Storefront.objects.create(name='Waffles')
+        crafts = Storefront.objects.create(name='Crafts Corner')
+        for index in range(6):
+            Product.objects.create(
+                store_id=waffles if index < 4 else crafts, name=f'Product {index}', description='Seeded',
+                category='Food' if index % 2 else 'Art', price=Decimal(50 + index * 100),
+                availability=index != 0
+            )
+
+    def get(self, **params):
+        return APIClient().get(self.URL, params).data
+
+    def test_counts_follow_the_filters(self):
+        data = self.get(availability='true')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['facets']['total'], 5)
+        self.assertEqual(data['facets']['availability'], {'in_stock': 5, 'out_of_stock': 0})
+
+    def test_category_and_store_facets_ignore_their_own_filter(self):
+        data = self.get(category='food', store='waffles')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual({product['name'] for product in data['results']}, {'Product 1', 'Product 3'})
+        # Every category in the picked store, and every store with food
+        self.assertEqual(data['facets']['categories'], [{'value': 'Art', 'count': 2}, {'value': 'Food', 'count': 2}])
+        self.assertEqual(
+            [(store['name'], store['count']) for store in data['facets']['stores']],
+            [('Waffles', 2), ('Crafts Corner', 1)]
+        )
+
+    def test_page_count_reuses_the_facet_total(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(category='art', page_size=2)
+        self.assertEqual((data['count'], len(data['results'])), (3, 2))
+        counts = [query['sql'] for query in queries.captured_queries if 'COUNT(' in query['sql']]
+        # Only the facets query counts
+        self.assertEqual(len(counts), 1, counts)
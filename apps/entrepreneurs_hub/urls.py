@@ -20,6 +20,7 @@ urlpatterns = [
     path('storefronts/<int:store_id>/', StorefrontDetailAPIView.as_view(), name='storefront-detail'),
     path('storefronts/<int:store_id>/products/', StorefrontProductsAPIView.as_view(), name='storefront-products'),
     path('products/categories/', ProductCategoryAPIView.as_view(), name='product-categories'),
+    path('products/facets/', ProductFacetsAPIView.as_view(), name='product-facets'),
     path('products/recent/', RecentlyAddedProducts.as_view(), name='recent-products'),
     path('search/', SearchViewAPI.as_view(), name='search-query'),
     path('search/advanced/', AdvancedSearchView.as_view(), name='advanced-search'),
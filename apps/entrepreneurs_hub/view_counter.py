@@ -0,0 +1,107 @@
+"""
+Buffered product view counting.
+
+Views are tallied in memory per worker and written back in batches: one
+UPDATE ... SET views = views + n per distinct n, covering every product
+viewed n times since the last flush. Queryset.update() skips the post_save
+handlers, so counting a view never recomputes the search vector.
+
+A flush happens as soon as MAX_PENDING views are waiting, and otherwise
+every FLUSH_INTERVAL seconds from a daemon thread the worker starts on its
+first recorded view, so views reach the database even when the worker goes
+idle. A last flush runs at interpreter exit; a crashed worker loses at most
+one interval's worth of views.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10.0
+MAX_PENDING = 500
+
+
+class ViewCounter:
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = defaultdict(int)
+        self.pending_total = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.flusher = None
+
+    def start(self):
+        """Start the thread that flushes every flush_interval seconds"""
+        with self.lock:
+            # Not alive after a fork: the child gets its own thread
+            if self.flusher is not None and self.flusher.is_alive():
+                return
+            self.stopped.clear()
+            self.flusher = threading.Thread(target=self.run_flusher, name='view-counter-flush', daemon=True)
+            self.flusher.start()
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still pending"""
+        self.stopped.set()
+        if self.flusher is not None:
+            self.flusher.join()
+        return self.flush()
+
+    def run_flusher(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            finally:
+                # Don't hold a connection open between flushes
+                connection.close()
+
+    def record(self, product_id, count=1):
+        if self.flusher is None or not self.flusher.is_alive():
+            self.start()
+        with self.lock:
+            self.pending[product_id] += count
+            self.pending_total += count
+            due = self.pending_total >= self.max_pending
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write pending counts; returns the number of views written"""
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(int)
+            self.pending_total = 0
+        if not pending:
+            return 0
+
+        by_count = defaultdict(list)
+        for product_id, count in pending.items():
+            by_count[count].append(product_id)
+        try:
+            with transaction.atomic():
+                for count, product_ids in by_count.items():
+                    Product.objects.filter(pk__in=product_ids).update(views=F('views') + count)
+        except Exception:
+            logger.exception('Could not flush product views; keeping them for the next flush')
+            with self.lock:
+                for product_id, count in pending.items():
+                    self.pending[product_id] += count
+                    self.pending_total += count
+            return 0
+        return sum(pending.values())
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.stop)
+
+
+def record_view(product_id):
+    view_counter.record(product_id)
@@ -1,11 +1,20 @@
 from django.shortcuts import render
-from .models import Product, Storefront, Rating, Owner
+from django.db import transaction
+from django.db.models import Q
+from .models import Category, Product, Storefront, Rating, Owner
 from .serializers import ProductSerializer, StorefrontSerializer, RatingSerializer
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.generics import RetrieveAPIView
-from rest_framework.pagination import PageNumberPagination
+from apps.common.pagination import (
+    CountedPageNumberPagination, CursorOrPageNumberPagination, InvalidCursor, KeysetPaginator, get_page_size
+)
+from apps.common.counting import AUTO, CAPPED
+from .categories import category_filter
+from .facets import facet_counts
+from .search import ranked_products
+from .view_counter import record_view
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import viewsets
@@ -14,58 +23,77 @@ from rest_framework import permissions
 from rest_framework import serializers
 
 # Create your views here.
-class ProductPagePagination(PageNumberPagination):
+class ProductPagePagination(CursorOrPageNumberPagination):
     page_size = 12
     page_size_query_param = 'page_size'
     max_page_size = 100
+    # Planner estimate for the unfiltered catalog, "1000+" for broad filters
+    count_strategy = AUTO
 
-class ProductListAPIView(ListAPIView):
-    serializer_class = ProductSerializer
-    pagination_class = ProductPagePagination
-    permission_classes = [AllowAny]  # Allow anonymous access to browse products
+class ProductSearchPagination(CountedPageNumberPagination):
+    # Ranked results are ordered by a computed score, so pages are numbered
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_strategy = CAPPED
 
-    def get_queryset(self):
-        queryset = Product.objects.all()
+def store_filter(name):
+    return Q(store_id__name__iexact=name)
 
-        category = self.request.query_params.get('category')
-        store = self.request.query_params.get('store')
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        availability = self.request.query_params.get('availability')
-        ordering = self.request.query_params.get('ordering')
+def filter_products(queryset, params, exclude=()):
+    """Apply the hub's category, store, price and availability filters, bar those named in exclude"""
+    category = params.get('category') if 'category' not in exclude else None
+    store = params.get('store') if 'store' not in exclude else None
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    availability = params.get('availability')
 
-        if category:
-            queryset = queryset.filter(category__iexact=category)
+    if category:
+        queryset = queryset.filter(category_filter(category))
 
-        if store:
-            queryset = queryset.filter(store_id__name__iexact=store)
+    if store:
+        queryset = queryset.filter(store_filter(store))
 
-        if min_price:
-            try:
-                min_price=float(min_price)
-                queryset = queryset.filter(price__gte=float(min_price))
-            except ValueError:
-                pass
-        
-        if max_price:
-            try:
-                max_price=float(max_price)
-                queryset = queryset.filter(price__lte=float(max_price))
-            except ValueError:
-                pass
-
-        if availability:
-            if availability.lower() == 'true':
-                queryset = queryset.filter(availability=True)
-            elif availability.lower() == 'false':
-                queryset = queryset.filter(availability=False)
-
-        if ordering in ['price', '-price']:
-            queryset = queryset.order_by(ordering)
-        else:
-            queryset = queryset.order_by('created_at') 
+    if min_price:
+        try:
+            min_price=float(min_price)
+            queryset = queryset.filter(price__gte=float(min_price))
+        except ValueError:
+            pass
+    
+    if max_price:
+        try:
+            max_price=float(max_price)
+            queryset = queryset.filter(price__lte=float(max_price))
+        except ValueError:
+            pass
+
+    if availability:
+        if availability.lower() == 'true':
+            queryset = queryset.filter(availability=True)
+        elif availability.lower() == 'false':
+            queryset = queryset.filter(availability=False)
+
+    return queryset
+
+def order_products(queryset, ordering):
+    if ordering in ['price', '-price']:
+        return queryset.order_by(ordering)
+    if ordering == 'popular':
+        # Scores are recomputed periodically by compute_popularity
+        return queryset.order_by('-popularity_score')
+    return queryset.order_by('created_at')
 
-        return queryset
+class ProductListAPIView(ListAPIView):
+    serializer_class = ProductSerializer
+    pagination_class = ProductPagePagination
+    permission_classes = [AllowAny]  # Allow anonymous access to browse products
+
+    def get_queryset(self):
+        queryset = filter_products(Product.objects.select_related('store_id'), self.request.query_params)
+        queryset = order_products(queryset, self.request.query_params.get('ordering'))
+        # ?fields=/?exclude= narrow the columns loaded for card grids
+        return ProductSerializer.narrow_queryset(queryset, self.request)
     
 class ProductDetailsAPIView(RetrieveAPIView):
     serializer_class = ProductSerializer
@@ -73,6 +101,12 @@ class ProductDetailsAPIView(RetrieveAPIView):
     queryset = Product.objects.all()
     lookup_field = 'product_id'
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Buffered in memory and flushed in batches, not a write per hit
+        record_view(self.kwargs[self.lookup_field])
+        return response
+
 class StorefrontAPIView(APIView):
     permission_classes = [AllowAny]  # Allow anonymous access to view storefronts
     
@@ -84,7 +118,8 @@ class ProductCategoryAPIView(APIView):
     permission_classes = [AllowAny]  # Allow anonymous access to view categories
     
     def get(self, request):
-        category_names = Product.objects.values_list("category", flat=True).distinct().order_by("category")
+        # Read from the maintained Category table instead of a DISTINCT over products
+        category_names = Category.objects.filter(product_count__gt=0).values_list("name", flat=True).order_by("name")
         return Response(category_names)
 
 class StorefrontsAPIView(ListAPIView):
@@ -93,15 +128,18 @@ class StorefrontsAPIView(ListAPIView):
     pagination_class = None
 
     def get_queryset(self):
-        queryset = Storefront.objects.all()
-        return queryset
+        queryset = Storefront.objects.select_related('owner', 'stats')
+        return StorefrontSerializer.narrow_queryset(queryset, self.request)
 
 class StorefrontDetailAPIView(RetrieveAPIView):
     serializer_class = StorefrontSerializer
-    queryset = Storefront.objects.all()
     lookup_field = 'store_id'
     permission_classes = [AllowAny]  # Allow public access to view storefront details
 
+    def get_queryset(self):
+        queryset = Storefront.objects.select_related('owner', 'stats')
+        return StorefrontSerializer.narrow_queryset(queryset, self.request)
+
 class StorefrontProductsAPIView(ListAPIView):
     serializer_class = ProductSerializer
     pagination_class = ProductPagePagination
@@ -109,13 +147,15 @@ class StorefrontProductsAPIView(ListAPIView):
 
     def get_queryset(self):
         store_id = self.kwargs.get('store_id')
-        queryset = Product.objects.filter(store_id=store_id)
+        queryset = Product.objects.filter(store_id=store_id).select_related('store_id')
         
         ordering = self.request.query_params.get('ordering', 'created_at')
-        if ordering in ['price', '-price', 'name', '-name', 'created_at', '-created_at']:
+        if ordering == 'popular':
+            queryset = queryset.order_by('-popularity_score')
+        elif ordering in ['price', '-price', 'name', '-name', 'created_at', '-created_at']:
             queryset = queryset.order_by(ordering)
         
-        return queryset
+        return ProductSerializer.narrow_queryset(queryset, self.request)
 
 class SearchViewAPI(APIView):
     permission_classes = [AllowAny]  # Allow anonymous access to search
@@ -124,20 +164,63 @@ class SearchViewAPI(APIView):
         query = request.GET.get('query', '').strip()
 
         if not query:
-            return Response([])
+            return Response({'count': 0, 'next': None, 'previous': None, 'results': []})
 
-        products = Product.objects.filter(name__icontains=query)
-        product_data = ProductSerializer(products, many=True).data
+        products = ranked_products(query, Product.objects.select_related('store_id'))
+        products = ProductSerializer.narrow_queryset(products, request)
+        paginator = ProductSearchPagination()
+        page = paginator.paginate_queryset(products, request, view=self)
+        product_data = ProductSerializer(page, many=True, context={'request': request}).data
         
-        return Response(product_data)
+        return paginator.get_paginated_response(product_data)
+
+
+class ProductFacetsAPIView(APIView):
+    permission_classes = [AllowAny]  # Allow anonymous access to browse products
 
+    def get(self, request):
+        params = request.query_params
+        query = params.get('query', '').strip()
+        # Category and store are applied after counting, so their facets
+        # can list the alternatives to the current choice
+        products = filter_products(
+            Product.objects.select_related('store_id'), params, exclude=('category', 'store')
+        )
+        own_filters = {
+            'category_filter': category_filter(params['category']) if params.get('category') else None,
+            'store_filter': store_filter(params['store']) if params.get('store') else None,
+        }
+
+        if query:
+            products = ranked_products(query, products)
+            paginator = ProductSearchPagination()
+        else:
+            products = order_products(products, params.get('ordering'))
+            paginator = ProductPagePagination()
+
+        facets = facet_counts(products, **own_filters)
+        results = products
+        for condition in own_filters.values():
+            if condition is not None:
+                results = results.filter(condition)
+
+        # The facet total already counted the page's rows
+        paginator.known_count = facets['total']
+        page = paginator.paginate_queryset(ProductSerializer.narrow_queryset(results, request), request, view=self)
+        response = paginator.get_paginated_response(
+            ProductSerializer(page, many=True, context={'request': request}).data
+        )
+        response.data['facets'] = facets
+        return response
     
 class RecentlyAddedProducts(APIView):
     permission_classes = [AllowAny]  # Allow anonymous access to view recent products
     
     def get(self, request):
-        recent_products = Product.objects.order_by('-created_at')[:10]
-        serializer = ProductSerializer(recent_products, many=True)
+        recent_products = ProductSerializer.narrow_queryset(
+            Product.objects.select_related('store_id').order_by('-created_at'), request
+        )[:10]
+        serializer = ProductSerializer(recent_products, many=True, context={'request': request})
         return Response(serializer.data)
 
 
@@ -146,14 +229,29 @@ class ProductRatingsAPIView(APIView):
     
     def get(self, request, product_id):
         try:
+            # Aggregates come from the product's stored rating counters
             product = Product.objects.get(product_id=product_id)
-            ratings = Rating.objects.filter(product=product).order_by('-created_at')
-            serializer = RatingSerializer(ratings, many=True)
+            ratings = Rating.objects.filter(product=product).select_related('user')
+            try:
+                page = KeysetPaginator(
+                    ratings,
+                    page_size=get_page_size(request),
+                    ordering=['-created_at', '-rating_id'],
+                ).page(request.query_params.get('cursor'))
+            except InvalidCursor:
+                return Response({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }, status=400)
+            serializer = RatingSerializer(page.rows, many=True)
             return Response({
                 'success': True,
                 'ratings': serializer.data,
+                'next_cursor': page.next_cursor,
+                'has_more': page.has_more,
                 'average_rating': product.get_average_rating(),
-                'rating_count': product.get_rating_count()
+                'rating_count': product.get_rating_count(),
+                'rating_histogram': product.get_rating_histogram()
             })
         except Product.DoesNotExist:
             return Response({
@@ -178,14 +276,19 @@ class SubmitRatingAPIView(APIView):
                     'error': 'Rating must be between 1 and 5'
                 }, status=400)
 
-            rating, created = Rating.objects.update_or_create(
-                product=product,
-                user=request.user,
-                defaults={
-                    'rating': rating_value,
-                    'review': review_text
-                }
-            )
+            # The product row lock serializes rating writes per product, so
+            # the aggregate deltas applied by the Rating signals never race
+            with transaction.atomic():
+                product = Product.objects.select_for_update(no_key=True).get(pk=product.pk)
+                rating, created = Rating.objects.update_or_create(
+                    product=product,
+                    user=request.user,
+                    defaults={
+                        'rating': int(rating_value),
+                        'review': review_text
+                    }
+                )
+            product.refresh_from_db(fields=['rating_sum', 'rating_count', *Product.STAR_FIELDS])
 
             serializer = RatingSerializer(rating)
             return Response({
@@ -237,7 +340,7 @@ class StorefrontViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Only show storefronts owned by the current user
-        return Storefront.objects.filter(owner__user=self.request.user)
+        return Storefront.objects.filter(owner__user=self.request.user).select_related('owner', 'stats')
     
     def perform_create(self, serializer):
         # Get or create an Owner instance for the current user
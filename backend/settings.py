@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -224,4 +225,10 @@ SIMPLE_JWT = {
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
     
     'JTI_CLAIM': 'jti',
-}
\ No newline at end of file
+}
+# Keep Product search vectors in a database trigger
+# (manage.py optimize_search --install-trigger) instead of a post_save UPDATE
+SEARCH_VECTOR_TRIGGER = os.getenv('SEARCH_VECTOR_TRIGGER', 'False').lower() in ('true', '1', 'yes')
+
+# Threads used to rebuild expired landing-bundle sections (1 = serially)
+LANDING_BUNDLE_WORKERS = int(os.getenv('LANDING_BUNDLE_WORKERS', '1'))
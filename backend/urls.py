@@ -19,6 +19,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.common.landing import LandingBundleAPIView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -26,6 +27,7 @@ urlpatterns = [
     path("api/entrepreneurs_hub/", include("apps.entrepreneurs_hub.urls")),
     path("api/accounts/", include("apps.accounts.urls")),
     path("api/laundry/", include("apps.laundry.urls")),
+    path("api/landing/", LandingBundleAPIView.as_view(), name="landing-bundle"),
 ]
 
 if settings.DEBUG: